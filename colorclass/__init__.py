@@ -10,25 +10,45 @@ https://pypi.python.org/pypi/colorclass
 
 from colorclass.codes import list_tags  # noqa
 from colorclass.color import Color  # noqa
+from colorclass.parse import escape  # noqa
+from colorclass.sanitize import sanitize  # noqa
+from colorclass.toggles import cache_info  # noqa
+from colorclass.toggles import clear_cache  # noqa
 from colorclass.toggles import disable_all_colors  # noqa
+from colorclass.toggles import disable_cache  # noqa
 from colorclass.toggles import disable_if_no_tty  # noqa
 from colorclass.toggles import enable_all_colors  # noqa
+from colorclass.toggles import enable_cache  # noqa
+from colorclass.toggles import get_color_depth  # noqa
+from colorclass.toggles import get_theme  # noqa
 from colorclass.toggles import is_enabled  # noqa
 from colorclass.toggles import is_light  # noqa
+from colorclass.toggles import set_color_depth  # noqa
 from colorclass.toggles import set_dark_background  # noqa
 from colorclass.toggles import set_light_background  # noqa
+from colorclass.toggles import set_theme  # noqa
 from colorclass.windows import Windows  # noqa
 
 
 __all__ = (
+    'cache_info',
+    'clear_cache',
     'Color',
     'disable_all_colors',
+    'disable_cache',
     'enable_all_colors',
+    'enable_cache',
+    'escape',
+    'get_color_depth',
+    'get_theme',
     'is_enabled',
     'is_light',
     'list_tags',
+    'sanitize',
+    'set_color_depth',
     'set_dark_background',
     'set_light_background',
+    'set_theme',
     'Windows',
 )
 
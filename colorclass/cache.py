@@ -0,0 +1,100 @@
+"""Bounded least recently used cache for parsed color markup."""
+
+import threading
+from collections import namedtuple
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+
+class LRUCache(object):
+    """Thread safe dictionary holding up to maxsize of the most recently used items. Stores nothing if maxsize is 0.
+
+    :ivar int hits: Number of get() calls that found their key.
+    :ivar int maxsize: Maximum number of items.
+    :ivar int misses: Number of get() calls that didn't find their key.
+    """
+
+    def __init__(self, maxsize=0):
+        """Constructor.
+
+        :param int maxsize: Maximum number of items.
+        """
+        self.hits = 0
+        self.maxsize = maxsize
+        self.misses = 0
+        self._links = dict()  # Values are links of a circular doubly linked list: [previous, next, key, value].
+        self._lock = threading.Lock()
+        self._root = list()  # Most recently used item is root[0], least recently used is root[1].
+        self._root[:] = [self._root, self._root, None, None]
+
+    def __len__(self):
+        """Number of items."""
+        return len(self._links)
+
+    def get(self, key):
+        """Return the value of key and mark it as most recently used.
+
+        :param key: Cache key.
+
+        :return: Cached value or None if missing.
+        """
+        with self._lock:
+            link = self._links.get(key)
+            if link is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+            # Move to front.
+            link[0][1], link[1][0] = link[1], link[0]
+            root = self._root
+            link[0], link[1] = root[0], root
+            root[0][1] = root[0] = link
+            return link[3]
+
+    def put(self, key, value):
+        """Store value, replacing the value of an existing key or evicting the least recently used item when full.
+
+        :param key: Cache key.
+        :param value: Value to store, must not be None.
+        """
+        with self._lock:
+            if not self.maxsize:
+                return
+            link = self._links.get(key)
+            if link is not None:
+                link[3] = value  # Already marked as most recently used by get().
+                return
+            if len(self._links) >= self.maxsize:
+                oldest = self._root[1]
+                oldest[0][1], oldest[1][0] = oldest[1], oldest[0]
+                del self._links[oldest[2]]
+            root = self._root
+            link = [root[0], root, key, value]
+            root[0][1] = root[0] = self._links[key] = link
+
+    def clear(self):
+        """Remove all items and reset statistics."""
+        with self._lock:
+            self._links.clear()
+            self._root[:] = [self._root, self._root, None, None]
+            self.hits = self.misses = 0
+
+    def resize(self, maxsize):
+        """Change the maximum number of items. Removes all items.
+
+        :param int maxsize: Maximum number of items. 0 disables the cache.
+        """
+        self.clear()
+        self.maxsize = maxsize
+
+    def info(self):
+        """Return cache statistics.
+
+        :return: Hits, misses, maxsize, and current size.
+        :rtype: CacheInfo
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._links))
+
+
+PARSE_CACHE = LRUCache()  # Disabled by default. Keys include the ANSICodeMapping toggles, values are parser outputs.
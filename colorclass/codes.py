@@ -1,8 +1,11 @@
 """Handles mapping between color names and ANSI codes and determining auto color codes."""
 
+import re
 import sys
 from collections import Mapping
 
+from colorclass.palette import downsample
+
 BASE_CODES = {
     '/all': 0, 'b': 1, 'f': 2, 'i': 3, 'u': 4, 'flash': 5, 'outline': 6, 'negative': 7, 'invis': 8, 'strike': 9,
     '/b': 22, '/f': 22, '/i': 23, '/u': 24, '/flash': 25, '/outline': 26, '/negative': 27, '/invis': 28,
@@ -39,6 +42,142 @@ BASE_CODES = {
     '/autobgred': 49, '/autobgblack': 49, '/autobgmagenta': 49, '/autobgwhite': 49, '/autobgblue': 49,
     '/autobgyellow': 49, '/autobggreen': 49, '/autobgcyan': 49,
 }
+AUTO_CODES = {  # Keys are LIGHT_BACKGROUND. Dark colors for light backgrounds and vice versa.
+    False: dict((k, BASE_CODES['hi' + k[4:]]) for k in BASE_CODES if k.startswith('auto')),
+    True: dict((k, BASE_CODES[k[4:]]) for k in BASE_CODES if k.startswith('auto')),
+}
+COLOR_TAG_CODES = dict()  # Memoized color_tag_codes() results. Keys are tags and color depths.
+COLOR_TAG_CODES_MAX = 1024
+RE_COLOR_TAG = re.compile(
+    r'(/?)(fg|bg):(?:(\d{1,3})|#([\da-fA-F]{6}|[\da-fA-F]{3})|rgb\(\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*\))$'
+)
+RE_COMBINED_SPLIT = re.compile(r',(?![^(]*\))')  # Commas outside of parentheses.
+RE_TAG = re.compile(r'{([^{}\033]+)}')
+RE_THEME_ALIAS = re.compile(r'\w+\Z')  # Word characters only. No ':' or '=' to mix up with fg: tags or format fields.
+
+
+def build_tag_codes(theme):
+    """Map every tag and theme alias to its color code string, for dark and light backgrounds.
+
+    :param dict theme: Keys are aliases (e.g. 'error'), values are combined tags (e.g. 'b,hired').
+
+    :return: Keys are LIGHT_BACKGROUND. Values are dicts like {'autored': '91', 'error': '1;91', '/error': '22;39'}.
+    :rtype: dict
+    """
+    tag_codes = dict()
+    for light in (False, True):
+        codes = dict((k, str(AUTO_CODES[light].get(k, v))) for k, v in BASE_CODES.items())
+        for alias, tags in theme.items():
+            names = tags.split(',')
+            closing = [codes['/' + n] for n in names if '/' + n in codes]
+            codes[alias] = ';'.join([codes[n] for n in names])
+            if closing:
+                codes['/' + alias] = ';'.join(closing)
+        tag_codes[light] = codes
+    return tag_codes
+
+
+TAG_CODES = build_tag_codes(dict())  # Rebuilt by ANSICodeMapping.set_theme().
+
+
+def color_tag_codes(tag):
+    """Resolve a 256-color or truecolor tag to color codes, downsampled to ANSICodeMapping.COLOR_DEPTH. Memoized.
+
+    Tags are 'fg:' or 'bg:' followed by a 256-color index ('fg:208'), hex RGB ('fg:#ff8800' or 'fg:#f80'), or decimal
+    RGB ('bg:rgb(255, 136, 0)'). Closing tags such as '/fg:208' reset the foreground or background color.
+
+    :param str tag: Tag name without curly brackets.
+
+    :return: Semicolon separated color codes or None if tag isn't a valid color tag.
+    :rtype: str
+    """
+    key = (tag, ANSICodeMapping.COLOR_DEPTH)
+    try:
+        return COLOR_TAG_CODES[key]
+    except KeyError:
+        pass
+    match = RE_COLOR_TAG.match(tag)
+    if not match:
+        return None
+    closing, layer, index, hex_rgb, red, green, blue = match.groups()
+    background = layer == 'bg'
+    if closing:
+        codes = '49' if background else '39'
+    elif index is not None:
+        if int(index) > 255:
+            return None
+        codes = downsample(None, int(index), background, key[1])
+    else:
+        if hex_rgb is not None:
+            hex_rgb = hex_rgb if len(hex_rgb) == 6 else ''.join(c * 2 for c in hex_rgb)
+            rgb = tuple(int(hex_rgb[i:i + 2], 16) for i in (0, 2, 4))
+        else:
+            rgb = (int(red), int(green), int(blue))
+        if max(rgb) > 255:
+            return None
+        codes = downsample(rgb, None, background, key[1])
+    if len(COLOR_TAG_CODES) >= COLOR_TAG_CODES_MAX:
+        COLOR_TAG_CODES.clear()
+    COLOR_TAG_CODES[key] = codes
+    return codes
+
+
+def link_tag_control(tag):
+    """Resolve a hyperlink tag such as 'link=https://example.com' or '/link' to an OSC 8 escape sequence.
+
+    :param str tag: Tag name without curly brackets.
+
+    :return: Escape sequence or None if tag isn't a hyperlink tag.
+    :rtype: str
+    """
+    if tag == '/link':
+        return '\033]8;;\033\\'
+    if tag.startswith('link=') and len(tag) > 5 and '\007' not in tag:
+        return '\033]8;;' + tag[5:] + '\033\\'
+    return None
+
+
+def combined_tag_codes(tag, codes):
+    """Resolve a combined tag such as 'red,b,bgblue' to the color codes of each tag, in one string.
+
+    A leading slash closes every tag in the combination: '/red,b,bgblue' is the same as '/red,/b,/bgblue'.
+
+    :param str tag: Tag names separated by commas, without curly brackets.
+    :param dict codes: Color code strings of tags (e.g. TAG_CODES[False]).
+
+    :return: Semicolon separated color codes or None if tag isn't a combination of valid tags.
+    :rtype: str
+    """
+    if ',' not in tag:
+        return None
+    names = RE_COMBINED_SPLIT.split(tag) if '(' in tag else tag.split(',')
+    if names[0].startswith('/'):
+        names = [n if n.startswith('/') else '/' + n for n in names]
+    resolved = list()
+    for name in names:
+        item = codes.get(name)
+        if item is None:
+            item = color_tag_codes(name) if ':' in name else None
+            if item is None:
+                return None
+        resolved.append(item)
+    return ';'.join(resolved)
+
+
+def extended_tag_codes(tag, codes):
+    """Resolve tags missing from the tag code tables: 256-color, truecolor, and combined tags.
+
+    :param str tag: Tag name without curly brackets.
+    :param dict codes: Color code strings of tags (e.g. TAG_CODES[False]).
+
+    :return: Semicolon separated color codes or None if tag isn't a color tag.
+    :rtype: str
+    """
+    if ',' in tag and (')' not in tag or RE_COMBINED_SPLIT.search(tag)):
+        return combined_tag_codes(tag, codes)
+    if ':' in tag:
+        return color_tag_codes(tag)
+    return None
 
 
 class ANSICodeMapping(Mapping):
@@ -46,17 +185,21 @@ class ANSICodeMapping(Mapping):
 
     :cvar bool DISABLE_COLORS: Disable colors (strip color codes).
     :cvar bool LIGHT_BACKGROUND: Use low intensity color codes.
+    :cvar int COLOR_DEPTH: Bits per color of 256-color and truecolor tags: 4 (16 colors), 8 (256 colors), or 24.
+    :cvar dict THEME: Named style aliases, keys are aliases and values are combined tags. Replaced by set_theme().
     """
 
+    COLOR_DEPTH = 24
     DISABLE_COLORS = False
     LIGHT_BACKGROUND = False
+    THEME = dict()
 
     def __init__(self, value_markup):
         """Constructor.
 
         :param str value_markup: String with {color} tags.
         """
-        self.whitelist = [k for k in BASE_CODES if '{' + k + '}' in value_markup]
+        self.whitelist = set(k for k in RE_TAG.findall(value_markup) if k in BASE_CODES)
 
     def __getitem__(self, item):
         """Return value for key or None if colors are disabled.
@@ -70,7 +213,7 @@ class ANSICodeMapping(Mapping):
             raise KeyError(item)
         if self.DISABLE_COLORS:
             return None
-        return getattr(self, item, BASE_CODES[item])
+        return AUTO_CODES[ANSICodeMapping.LIGHT_BACKGROUND].get(item, BASE_CODES[item])
 
     def __iter__(self):
         """Iterate dictionary."""
@@ -102,6 +245,37 @@ class ANSICodeMapping(Mapping):
         cls.disable_all_colors()
         return True
 
+    @classmethod
+    def set_color_depth(cls, depth):
+        """Downsample 256-color and truecolor tags to the colors a terminal supports.
+
+        :raise ValueError: On unsupported depths.
+
+        :param int depth: Bits per color: 4 (16 colors), 8 (256 colors), or 24 (truecolor).
+        """
+        if depth not in (4, 8, 24):
+            raise ValueError('Unsupported color depth: {0}'.format(depth))
+        cls.COLOR_DEPTH = depth
+
+    @classmethod
+    def set_theme(cls, theme):
+        """Replace named style aliases and rebuild the color code tables once.
+
+        :raise ValueError: On aliases with other than word characters, shadowing built-in tags or their closing tags
+            (e.g. 'all' and '/all'), or unknown tags in values.
+
+        :param dict theme: Keys are aliases (e.g. 'error'), values are combined tags (e.g. 'b,hired'). None to clear.
+        """
+        theme = dict(theme or ())
+        for alias, tags in theme.items():
+            if alias in BASE_CODES or '/' + alias in BASE_CODES or not RE_THEME_ALIAS.match(alias):
+                raise ValueError('Invalid theme alias: {0}'.format(alias))
+            unknown = [n for n in tags.split(',') if n not in BASE_CODES]
+            if unknown:
+                raise ValueError('Unknown tag in theme alias {0}: {1}'.format(alias, unknown[0]))
+        TAG_CODES.update(build_tag_codes(theme))
+        cls.THEME = theme
+
     @classmethod
     def set_dark_background(cls):
         """Choose dark colors for all 'auto'-prefixed codes for readability on light backgrounds."""
@@ -112,86 +286,6 @@ class ANSICodeMapping(Mapping):
         """Choose dark colors for all 'auto'-prefixed codes for readability on light backgrounds."""
         cls.LIGHT_BACKGROUND = True
 
-    @property
-    def autoblack(self):
-        """Return automatic black foreground color depending on background color."""
-        return BASE_CODES['black' if ANSICodeMapping.LIGHT_BACKGROUND else 'hiblack']
-
-    @property
-    def autored(self):
-        """Return automatic red foreground color depending on background color."""
-        return BASE_CODES['red' if ANSICodeMapping.LIGHT_BACKGROUND else 'hired']
-
-    @property
-    def autogreen(self):
-        """Return automatic green foreground color depending on background color."""
-        return BASE_CODES['green' if ANSICodeMapping.LIGHT_BACKGROUND else 'higreen']
-
-    @property
-    def autoyellow(self):
-        """Return automatic yellow foreground color depending on background color."""
-        return BASE_CODES['yellow' if ANSICodeMapping.LIGHT_BACKGROUND else 'hiyellow']
-
-    @property
-    def autoblue(self):
-        """Return automatic blue foreground color depending on background color."""
-        return BASE_CODES['blue' if ANSICodeMapping.LIGHT_BACKGROUND else 'hiblue']
-
-    @property
-    def automagenta(self):
-        """Return automatic magenta foreground color depending on background color."""
-        return BASE_CODES['magenta' if ANSICodeMapping.LIGHT_BACKGROUND else 'himagenta']
-
-    @property
-    def autocyan(self):
-        """Return automatic cyan foreground color depending on background color."""
-        return BASE_CODES['cyan' if ANSICodeMapping.LIGHT_BACKGROUND else 'hicyan']
-
-    @property
-    def autowhite(self):
-        """Return automatic white foreground color depending on background color."""
-        return BASE_CODES['white' if ANSICodeMapping.LIGHT_BACKGROUND else 'hiwhite']
-
-    @property
-    def autobgblack(self):
-        """Return automatic black background color depending on background color."""
-        return BASE_CODES['bgblack' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibgblack']
-
-    @property
-    def autobgred(self):
-        """Return automatic red background color depending on background color."""
-        return BASE_CODES['bgred' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibgred']
-
-    @property
-    def autobggreen(self):
-        """Return automatic green background color depending on background color."""
-        return BASE_CODES['bggreen' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibggreen']
-
-    @property
-    def autobgyellow(self):
-        """Return automatic yellow background color depending on background color."""
-        return BASE_CODES['bgyellow' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibgyellow']
-
-    @property
-    def autobgblue(self):
-        """Return automatic blue background color depending on background color."""
-        return BASE_CODES['bgblue' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibgblue']
-
-    @property
-    def autobgmagenta(self):
-        """Return automatic magenta background color depending on background color."""
-        return BASE_CODES['bgmagenta' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibgmagenta']
-
-    @property
-    def autobgcyan(self):
-        """Return automatic cyan background color depending on background color."""
-        return BASE_CODES['bgcyan' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibgcyan']
-
-    @property
-    def autobgwhite(self):
-        """Return automatic white background color depending on background color."""
-        return BASE_CODES['bgwhite' if ANSICodeMapping.LIGHT_BACKGROUND else 'hibgwhite']
-
 
 def list_tags():
     """List the available tags.
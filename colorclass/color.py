@@ -1,6 +1,10 @@
 """Color class used by library users."""
 
+from colorclass.codes import ANSICodeMapping
 from colorclass.core import ColorStr
+from colorclass.parse import parse_input_bytes
+from colorclass.sanitize import sanitize
+from colorclass.template import cached_template, Template
 
 
 class Color(ColorStr):
@@ -13,6 +17,66 @@ class Color(ColorStr):
     For a list of codes, call: colorclass.list_tags()
     """
 
+    __slots__ = ()
+
+    @classmethod
+    def compile(cls, markup):
+        """Parse markup once into a template for rendering many strings with str.format() style placeholders.
+
+        Color.compile(markup).render(*args, **kwargs) returns the same as Color(markup).format(*args, **kwargs) without
+        parsing markup on every call.
+
+        :param str markup: Color markup with placeholders, e.g. '{red}{0}{/red} {name!r:>10}'.
+
+        :return: Template with a render() method.
+        :rtype: colorclass.template.Template
+        """
+        return Template(cls, markup)
+
+    @classmethod
+    def from_format(cls, format_string, *args, **kwargs):
+        """Substitute str.format() style placeholders in color markup with values as literal text.
+
+        Unlike Color(format_string.format(*args, **kwargs)), tags in values aren't parsed. Values are spliced in between
+        the parsed markup instead of being scanned for tags, and markup is parsed once for every call with it.
+
+        :param str format_string: Color markup with placeholders, e.g. '{red}{0}{/red} {name!r:>10}'.
+        :param iter args: Positional values.
+        :param dict kwargs: Keyword values.
+
+        :return: Class instance.
+        :rtype: Color
+        """
+        return cached_template(cls, format_string).render(*args, **kwargs)
+
+    @classmethod
+    def parse_bytes(cls, data, keep_tags=False):
+        """Convert color markup in UTF-8 encoded bytes without decoding them or creating an instance.
+
+        :param data: Bytes, bytearray, or memoryview with color tags and/or ANSI escape sequences.
+        :param bool keep_tags: Skip parsing tags into ANSI escape sequences.
+
+        :return: 2-item tuple of bytes. First item is the colored output, second item is the output without any colors.
+        :rtype: tuple
+        """
+        return parse_input_bytes(data, ANSICodeMapping.DISABLE_COLORS, keep_tags, cls.TAG_DELIMITERS, cls.ESCAPE_TAGS)
+
+    @classmethod
+    def from_untrusted(cls, text, keep_colors=False, escape=False):
+        """Instantiate from untrusted text, such as user input, without parsing color tags.
+
+        Escape sequences and control characters are removed first. Without keep_colors the sanitized text can't have
+        any escape sequences left, so it isn't scanned again.
+
+        :param str text: Untrusted text.
+        :param bool keep_colors: Keep escape sequences that only set colors and styles.
+        :param bool escape: Make control characters visible instead of removing them.
+
+        :return: Class instance.
+        :rtype: Color
+        """
+        return cls(sanitize(text, keep_colors, escape), keep_tags=True)
+
     @classmethod
     def colorize(cls, color, string, auto=False):
         """Color-code entire string using specified color.
@@ -25,7 +89,8 @@ class Color(ColorStr):
         :rtype: Color
         """
         tag = '{0}{1}'.format('auto' if auto else '', color)
-        return cls('{%s}%s{/%s}' % (tag, string, tag))
+        opening, closing = cls.TAG_DELIMITERS
+        return cls('%s%s%s%s%s/%s%s' % (opening, tag, closing, string, opening, tag, closing))
 
     @classmethod
     def black(cls, string, auto=False):
@@ -1,10 +1,17 @@
 """String subclass that handles ANSI color codes."""
 
+import sys
+
+from colorclass.cache import PARSE_CACHE
 from colorclass.codes import ANSICodeMapping
-from colorclass.parse import parse_input, RE_SPLIT
-from colorclass.search import build_color_index, find_char_color
+from colorclass.parse import parse_input, parse_runs, RE_SPLIT, render_runs, strip_input, style_runs, TAG_DELIMITERS
+from colorclass.search import (
+    build_color_index, closing_codes, codes_style, iter_char_colors, slice_colors, wrap_codes, wrap_link,
+)
 
 PARENT_CLASS = type(u'')
+PLAIN_CLASSES = (PARENT_CLASS, str)  # Python 2 str too, PARENT_CLASS.__new__() decodes it like parse_input() output.
+SLICE_ALL = slice(None)  # Copies a str subclass instance into a plain str.
 
 
 def apply_text(incoming, func):
@@ -15,14 +22,36 @@ def apply_text(incoming, func):
 
     :return: Modified string, same class type as incoming string.
     """
-    split = RE_SPLIT.split(incoming)
+    split = RE_SPLIT.split(getattr(incoming, 'value_colors', incoming))  # Python 2 regexes slice with __getslice__().
     for i, item in enumerate(split):
         if not item or RE_SPLIT.match(item):
             continue
         split[i] = func(item)
+
+    # Escape sequences are unchanged, skip parsing unless text between them is gone or may form new ones.
+    texts = split[::2]
+    if (isinstance(incoming, ColorStr) and not (ANSICodeMapping.DISABLE_COLORS and incoming.has_colors) and
+            all(texts[1:-1]) and not any('\033' in t for t in texts)):
+        return incoming._from_parsed(''.join(split), ''.join(texts))  # pylint: disable=protected-access
+
     return incoming.__class__().join(split)
 
 
+def rebuild(cls, value_colors, state=None):
+    """Restore a pickled instance from its colored output without parsing it again. See ColorStr.__reduce__().
+
+    :param cls: ColorStr subclass.
+    :param str value_colors: Parsed output with normalized escape sequences.
+    :param dict state: Instance __dict__ of subclasses that have one.
+
+    :return: Class instance.
+    """
+    instance = cls._from_parsed(value_colors)  # pylint: disable=protected-access
+    if state:
+        instance.__dict__.update(state)
+    return instance
+
+
 class ColorBytes(bytes):
     """Str (bytes in Python3) subclass, .decode() overridden to return unicode (str in Python3) subclass instance."""
 
@@ -49,48 +78,227 @@ class ColorBytes(bytes):
 
 
 class ColorStr(PARENT_CLASS):
-    """Core color class."""
+    """Core color class.
+
+    :cvar tuple TAG_DELIMITERS: Opening and closing string of color tags. Subclasses may use e.g. ('[[', ']]').
+    :cvar bool ESCAPE_TAGS: Backslashes before tags escape them, see colorclass.escape(). Off by default, it changes
+        the meaning of backslashes in existing markup such as '{red}C:\\{/red}'.
+    """
+
+    __slots__ = ('_color_index', '_has_colors', '_value_no_colors')  # No __dict__, see _from_parsed().
+    ESCAPE_TAGS = False
+    TAG_DELIMITERS = TAG_DELIMITERS
 
     def __new__(cls, *args, **kwargs):
         """Parse color markup and instantiate."""
         keep_tags = kwargs.pop('keep_tags', False)
 
-        # Parse string.
+        # Skip parsing strings without markup and escape sequences.
         value_markup = args[0] if args else PARENT_CLASS()  # e.g. '{red}test{/red}'
-        value_colors, value_no_colors = parse_input(value_markup, ANSICodeMapping.DISABLE_COLORS, keep_tags)
-        color_index = build_color_index(value_colors)
+        value = getattr(value_markup, 'value_colors', value_markup)
+        opening = cls.TAG_DELIMITERS[0]
+        if value.__class__ in PLAIN_CLASSES and '\033' not in value and (keep_tags or opening not in value):
+            return cls._from_parsed(value, value, args=args[1:], kwargs=kwargs)
+
+        # Colors disabled, plain text and colored text are the same.
+        if ANSICodeMapping.DISABLE_COLORS:
+            value = strip_input(value, keep_tags, cls.TAG_DELIMITERS, cls.ESCAPE_TAGS)
+            return cls._from_parsed(value, value, args=args[1:], kwargs=kwargs)
+
+        # Parse string. The version without colors is derived on first access.
+        if not PARSE_CACHE.maxsize:
+            value_colors = parse_input(value, False, keep_tags, cls.TAG_DELIMITERS, False, cls.ESCAPE_TAGS)[0]
+            return cls._from_parsed(value_colors, args=args[1:], kwargs=kwargs)
+
+        # Cached runs are rendered again after toggles change, without parsing.
+        key = (value, keep_tags, cls.TAG_DELIMITERS, cls.ESCAPE_TAGS)
+        toggles = (ANSICodeMapping.LIGHT_BACKGROUND, ANSICodeMapping.COLOR_DEPTH)
+        cached = PARSE_CACHE.get(key)
+        if cached is not None and cached[1] == toggles:
+            value_colors = cached[2]
+        else:
+            runs = parse_runs(value, keep_tags, cls.TAG_DELIMITERS, cls.ESCAPE_TAGS) if cached is None else cached[0]
+            value_colors = render_runs(runs, False, False, cls.TAG_DELIMITERS)[0]
+            PARSE_CACHE.put(key, (runs, toggles, value_colors))
 
         # Instantiate.
-        color_args = [cls, value_colors] + list(args[1:])
-        instance = PARENT_CLASS.__new__(*color_args, **kwargs)
-
-        # Add additional attributes and return.
-        instance.value_colors = value_colors
-        instance.value_no_colors = value_no_colors
-        instance.has_colors = value_colors != value_no_colors
-        instance.color_index = color_index
+        return cls._from_parsed(value_colors, args=args[1:], kwargs=kwargs)
+
+    @classmethod
+    def from_many(cls, iterable, keep_tags=False, workers=None):
+        """Parse many strings, such as the cells of a large table, returning instances in input order.
+
+        Each distinct string is parsed once per batch, equal strings of the same class share one instance.
+
+        :param iter iterable: Strings with color markup.
+        :param bool keep_tags: Skip parsing curly bracket tags into ANSI escape sequences.
+        :param int workers: Parse in a pool of this many threads. Only used on free-threaded builds with the GIL
+            disabled, where threads run in parallel. Otherwise strings are parsed in the calling thread.
+
+        :return: List of class instances.
+        :rtype: list
+        """
+        keys = [(v.__class__, v) for v in iterable]  # Instances and plain strings may be equal but parse differently.
+        unique = list(set(keys))
+        if workers and workers > 1 and len(unique) > 1 and not getattr(sys, '_is_gil_enabled', lambda: True)():
+            from multiprocessing.pool import ThreadPool  # Imported here, rarely needed and slow to import.
+            pool = ThreadPool(workers)
+            try:
+                parsed = pool.map(lambda k: cls(k[1], keep_tags=keep_tags), unique, -(-len(unique) // (workers * 4)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            parsed = [cls(v, keep_tags=keep_tags) for _, v in unique]
+        instances = dict(zip(unique, parsed))
+        return [instances[k] for k in keys]
+
+    @classmethod
+    def _from_parsed(cls, value_colors, value_no_colors=None, color_index=None, args=(), kwargs=None):
+        """Instantiate from already parsed strings, skipping the parser.
+
+        The colored output is only stored as the str value of the instance, value_colors returns a copy of it. The
+        output without colors is only stored if it's different.
+
+        :param str value_colors: Parsed output with normalized escape sequences.
+        :param str value_no_colors: Parsed output without any colors. Derived from value_colors on first access if None.
+        :param ColorIndex color_index: Output of build_color_index(value_colors). Built on first access if None.
+        :param iter args: Additional positional arguments for the parent class.
+        :param dict kwargs: Keyword arguments for the parent class.
+
+        :return: Class instance.
+        """
+        instance = PARENT_CLASS.__new__(cls, value_colors, *args, **(kwargs or dict()))
+        instance._has_colors = None if value_no_colors is None else len(value_no_colors) != len(value_colors)
+        instance._value_no_colors = value_no_colors if instance._has_colors else None
+        instance._color_index = color_index
         return instance
 
+    def _split_colors(self):
+        """Derive the output without colors from the colored output and store it if it's different."""
+        value_no_colors = RE_SPLIT.sub('', self.value_colors) if PARENT_CLASS.__contains__(self, '\033') else None
+        self._has_colors = value_no_colors is not None and len(value_no_colors) != PARENT_CLASS.__len__(self)
+        self._value_no_colors = value_no_colors if self._has_colors else None
+
+    @property
+    def color_index(self):
+        """Position of each visible character in value_colors. Built on first access."""
+        if self._color_index is None:
+            self._color_index = build_color_index(self.value_colors)
+        return self._color_index
+
+    @property
+    def has_colors(self):
+        """True if value_colors has any escape sequences."""
+        if self._has_colors is None:
+            self._split_colors()
+        return self._has_colors
+
+    @property
+    def value_colors(self):
+        """Parsed output with normalized escape sequences, the str value of the instance."""
+        return PARENT_CLASS.__getitem__(self, SLICE_ALL)
+
+    @property
+    def value_no_colors(self):
+        """Parsed output without any colors (what users see). Derived from value_colors on first access."""
+        if self._has_colors is None:
+            self._split_colors()
+        return self._value_no_colors if self._has_colors else PARENT_CLASS.__getitem__(self, SLICE_ALL)
+
+    def _concat(self, parts):
+        """Join instances and strings without parsing them again, if parsing wouldn't change the result.
+
+        That is the case when at most one part has colors and no part has stray escape characters. Otherwise escape
+        sequences of different parts may be combined or become redundant.
+
+        :param iter parts: ColorStr instances and strings to join.
+
+        :return: Class instance or None if the joined string has to be parsed.
+        """
+        value_colors = list()
+        value_no_colors = list()
+        colored = False
+        for part in parts:
+            if isinstance(part, ColorStr):
+                if part.has_colors:
+                    if colored or ANSICodeMapping.DISABLE_COLORS:
+                        return None
+                    colored = True
+                if '\033' in part.value_no_colors:
+                    return None
+                value_colors.append(part.value_colors)
+                value_no_colors.append(part.value_no_colors)
+            elif isinstance(part, PLAIN_CLASSES):
+                if '\033' in part:
+                    return None
+                value_colors.append(part)
+                value_no_colors.append(part)
+            else:
+                return None
+        return self._from_parsed(''.join(value_colors), ''.join(value_no_colors))
+
+    def _pad(self, result):
+        """Surround with the padding of the justified plain string, without parsing again if possible.
+
+        :param str result: Justified value_no_colors.
+
+        :return: Class instance.
+        """
+        value_no_colors = self.value_no_colors
+        if (not value_no_colors or '\033' in result or (ANSICodeMapping.DISABLE_COLORS and self.has_colors) or
+                result.count(value_no_colors) != 1):
+            return self.__class__(result.replace(value_no_colors, self.value_colors), keep_tags=True)
+        left = result.find(value_no_colors)
+        return self._from_parsed(result[:left] + self.value_colors + result[left + len(value_no_colors):], result)
+
     def __add__(self, other):
         """Concatenate."""
-        return self.__class__(self.value_colors + other, keep_tags=True)
+        result = self._concat((self, other))
+        if result is None:
+            result = self.__class__(self.value_colors + other, keep_tags=True)
+        return result
 
     def __getitem__(self, item):
-        """Retrieve character."""
-        try:
-            color_pos = self.color_index[int(item)]
-        except TypeError:  # slice
-            return super(ColorStr, self).__getitem__(item)
-        return self.__class__(find_char_color(self.value_colors, color_pos), keep_tags=True)
+        """Retrieve visible characters along with their colors and hyperlinks, looking them up in color_index.
+
+        Slices start with the style and hyperlink active at their first character and reset the ones still active at
+        the end.
+        """
+        if isinstance(item, slice):
+            if not self.has_colors:
+                value = PARENT_CLASS.__getitem__(self, item)
+                return self.__class__._from_parsed(value, value)
+            start, stop, step = item.indices(len(self))
+            return self.__class__(slice_colors(self, start, stop, step, self.color_index), keep_tags=True)
+        color_index = self.color_index
+        color_pos = color_index[int(item)]
+        char = PARENT_CLASS.__getitem__(self, color_pos)
+        if not self.has_colors:
+            return self.__class__._from_parsed(char, char)
+        run = color_index.find_run(int(item) % len(color_index))
+        codes = color_index.codes_before(run)
+        return self.__class__(wrap_link(wrap_codes(char, codes, closing_codes(codes)), color_index.link_before(run)),
+                              keep_tags=True)
+
+    def __getslice__(self, i, j):
+        """Slice on Python 2, which calls this instead of __getitem__() with negative positions adjusted by len()."""
+        return self.__getitem__(slice(i, j))
 
     def __iter__(self):
-        """Yield one color-coded character at a time."""
-        for color_pos in self.color_index:
-            yield self.__class__(find_char_color(self.value_colors, color_pos))
+        """Yield one color-coded character at a time, walking the string once."""
+        if not self.has_colors or ANSICodeMapping.DISABLE_COLORS:
+            for char in self.value_no_colors:
+                yield self.__class__._from_parsed(char, char)
+            return
+        for value_colors, char in iter_char_colors(self.value_colors):
+            yield self.__class__._from_parsed(value_colors, char)
 
     def __len__(self):
         """Length of string without color codes (what users expect)."""
-        return self.value_no_colors.__len__()
+        if self.has_colors:
+            return self._value_no_colors.__len__()
+        return PARENT_CLASS.__len__(self)
 
     def __mod__(self, other):
         """String substitution (like printf)."""
@@ -100,9 +308,19 @@ class ColorStr(PARENT_CLASS):
         """Multiply string."""
         return self.__class__(self.value_colors * other, keep_tags=True)
 
+    def __reduce__(self):
+        """Pickle the colored output only, parsing it again could interpret escaped tags. Lazy fields are rebuilt."""
+        return rebuild, (self.__class__, self.value_colors, getattr(self, '__dict__', None))
+
     def __repr__(self):
         """Representation of a class instance (like datetime.datetime.now())."""
-        return '{name}({value})'.format(name=self.__class__.__name__, value=repr(self.value_colors))
+        value = self.value_colors
+        if PARENT_CLASS is not str:  # Python 2, show ASCII values as str like value_colors of str input used to be.
+            try:
+                value = value.encode('ascii')
+            except UnicodeEncodeError:
+                pass
+        return '{name}({value})'.format(name=self.__class__.__name__, value=repr(value))
 
     def capitalize(self):
         """Return a copy of the string with only its first character capitalized."""
@@ -118,7 +336,7 @@ class ColorStr(PARENT_CLASS):
             result = self.value_no_colors.center(width, fillchar)
         else:
             result = self.value_no_colors.center(width)
-        return self.__class__(result.replace(self.value_no_colors, self.value_colors), keep_tags=True)
+        return self._pad(result)
 
     def count(self, sub, start=0, end=-1):
         """Return the number of non-overlapping occurrences of substring sub in string[start:end].
@@ -231,12 +449,29 @@ class ColorStr(PARENT_CLASS):
         """Return True if all cased characters are uppercase and there is at least one cased character in it."""
         return self.value_no_colors.isupper()
 
+    def iter_runs(self):
+        """Yield runs of text with the same style, for renderers other than ANSI terminals.
+
+        :return: Yields 2-item tuples: active color codes (tuple of str, e.g. ('1', '31'), empty for the default style)
+            and text. Other escape sequences are yielded as colorclass.parse.Control instances.
+        :rtype: iter
+        """
+        if not self.has_colors:
+            return iter([((), self.value_no_colors)] if self else [])
+        return style_runs(self.value_colors)
+
     def join(self, iterable):
         """Return a string which is the concatenation of the strings in the iterable.
 
         :param iterable: Join items in this iterable.
         """
-        return self.__class__(super(ColorStr, self).join(iterable), keep_tags=True)
+        items = list(iterable)
+        parts = [self] * (len(items) * 2 - 1) if items else list()
+        parts[::2] = items
+        result = self._concat(parts)
+        if result is None:
+            result = self.__class__(super(ColorStr, self).join(items), keep_tags=True)
+        return result
 
     def ljust(self, width, fillchar=None):
         """Return left-justified string of length width. Padding is done using the specified fill character or space.
@@ -248,7 +483,7 @@ class ColorStr(PARENT_CLASS):
             result = self.value_no_colors.ljust(width, fillchar)
         else:
             result = self.value_no_colors.ljust(width)
-        return self.__class__(result.replace(self.value_no_colors, self.value_colors), keep_tags=True)
+        return self._pad(result)
 
     def rfind(self, sub, start=None, end=None):
         """Return the highest index where substring sub is found, such that sub is contained within string[start:end].
@@ -280,7 +515,7 @@ class ColorStr(PARENT_CLASS):
             result = self.value_no_colors.rjust(width, fillchar)
         else:
             result = self.value_no_colors.rjust(width)
-        return self.__class__(result.replace(self.value_no_colors, self.value_colors), keep_tags=True)
+        return self._pad(result)
 
     def splitlines(self, keepends=False):
         """Return a list of the lines in the string, breaking at line boundaries.
@@ -289,7 +524,7 @@ class ColorStr(PARENT_CLASS):
 
         :param bool keepends: Include linebreaks.
         """
-        return [self.__class__(l) for l in self.value_colors.splitlines(keepends)]
+        return [self.__class__(l, keep_tags=True) for l in self.value_colors.splitlines(keepends)]
 
     def startswith(self, prefix, start=0, end=-1):
         """Return True if string starts with the specified prefix, False otherwise.
@@ -303,6 +538,23 @@ class ColorStr(PARENT_CLASS):
         """
         return self.value_no_colors.startswith(prefix, start, end)
 
+    def style_at(self, pos):
+        """Return the style of a visible character, looked up in color_index.
+
+        :raise IndexError: When pos is out of range.
+
+        :param int pos: Position of the character in value_no_colors, may be negative.
+
+        :return: Named tuple with fg and bg codes (e.g. '31' or '38;5;208', None for the default color) and flags, a
+            frozenset of attribute tags (e.g. 'b' and 'u').
+        :rtype: colorclass.search.Style
+        """
+        color_index = self.color_index
+        pos = int(pos)
+        if not -len(color_index) <= pos < len(color_index):
+            raise IndexError('string index out of range')
+        return codes_style(color_index.codes_before(color_index.find_run(pos % len(color_index))))
+
     def swapcase(self):
         """Return a copy of the string with uppercase characters converted to lowercase and vice versa."""
         return apply_text(self, lambda s: s.swapcase())
@@ -335,6 +587,17 @@ class ColorStr(PARENT_CLASS):
 
         :param int width: Length of output string.
         """
+        value_no_colors = self.value_no_colors
+        color_index = self.color_index
+        if (value_no_colors and '\033' not in value_no_colors and
+                not (ANSICodeMapping.DISABLE_COLORS and self.has_colors) and
+                color_index[-1] - color_index[0] == len(color_index) - 1 and
+                self.value_colors.count(value_no_colors) == 1):
+            # Text isn't interrupted by escape sequences, only its length changes.
+            start = color_index[0]
+            filled = value_no_colors.zfill(width)
+            value_colors = self.value_colors[:start] + filled + self.value_colors[start + len(value_no_colors):]
+            return self._from_parsed(value_colors, filled)
         if not self.value_no_colors:
             result = self.value_no_colors.zfill(width)
         else:
@@ -0,0 +1,115 @@
+"""Convert 256-color and truecolor values to the nearest color of smaller palettes."""
+
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)  # Channel values of the 6x6x6 color cube, indexes 16 to 231.
+PALETTE_16 = (  # RGB values of the 16 basic colors as xterm renders them, indexes 0 to 15.
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255),
+    (255, 255, 255),
+)
+PALETTE_256 = PALETTE_16 + tuple((r, g, b) for r in CUBE_LEVELS for g in CUBE_LEVELS for b in CUBE_LEVELS) + tuple(
+    (v, v, v) for v in range(8, 248, 10)  # Grayscale ramp, indexes 232 to 255.
+)
+NEAREST_16 = dict()  # Memoized nearest_16() results. Keys are RGB tuples.
+NEAREST_16_MAX = 4096
+NEAREST_256 = dict()  # Memoized nearest_256() results. Keys are RGB tuples.
+NEAREST_256_MAX = 4096
+
+
+def distance(rgb1, rgb2):
+    """Squared euclidean distance between two colors.
+
+    :param tuple rgb1: Red, green, and blue integers (0 to 255).
+    :param tuple rgb2: Red, green, and blue integers (0 to 255).
+
+    :return: Distance.
+    :rtype: int
+    """
+    return (rgb1[0] - rgb2[0]) ** 2 + (rgb1[1] - rgb2[1]) ** 2 + (rgb1[2] - rgb2[2]) ** 2
+
+
+def nearest_16(rgb):
+    """Return the index of the basic color closest to a color. Memoized.
+
+    :param tuple rgb: Red, green, and blue integers (0 to 255).
+
+    :return: Index in PALETTE_16.
+    :rtype: int
+    """
+    try:
+        return NEAREST_16[rgb]
+    except KeyError:
+        pass
+    index = min(range(16), key=lambda i: distance(rgb, PALETTE_16[i]))
+    if len(NEAREST_16) >= NEAREST_16_MAX:
+        NEAREST_16.clear()
+    NEAREST_16[rgb] = index
+    return index
+
+
+def nearest_256(rgb):
+    """Return the index of the color cube or grayscale color closest to a color, like tmux does. Memoized.
+
+    Only the two candidates nearest on each channel are compared, instead of all 256 colors.
+
+    :param tuple rgb: Red, green, and blue integers (0 to 255).
+
+    :return: Index in PALETTE_256, 16 or higher.
+    :rtype: int
+    """
+    try:
+        return NEAREST_256[rgb]
+    except KeyError:
+        pass
+
+    # Nearest color cube color.
+    levels = [0 if v < 48 else 1 if v < 115 else (v - 35) // 40 for v in rgb]
+    cube_index = 16 + 36 * levels[0] + 6 * levels[1] + levels[2]
+
+    # Nearest gray.
+    average = sum(rgb) // 3
+    gray_level = 23 if average > 238 else max(0, (average - 3) // 10)
+    gray_index = 232 + gray_level
+
+    if distance(rgb, PALETTE_256[gray_index]) < distance(rgb, PALETTE_256[cube_index]):
+        index = gray_index
+    else:
+        index = cube_index
+    if len(NEAREST_256) >= NEAREST_256_MAX:
+        NEAREST_256.clear()
+    NEAREST_256[rgb] = index
+    return index
+
+
+def basic_code(index, background):
+    """Return the 16-color SGR code of a basic color.
+
+    :param int index: Index in PALETTE_16.
+    :param bool background: Background instead of foreground code.
+
+    :return: Color code (e.g. 31 or 101).
+    :rtype: int
+    """
+    return (40 if background else 30) + index if index < 8 else (100 if background else 90) + index - 8
+
+
+def downsample(rgb, index, background, depth):
+    """Convert a 256-color or truecolor value into color codes supported by a color depth.
+
+    :param tuple rgb: Red, green, and blue integers (0 to 255). None for 256-color values.
+    :param int index: Index in PALETTE_256. None for truecolor values.
+    :param bool background: Background instead of foreground color.
+    :param int depth: Bits per color: 4 (16 colors), 8 (256 colors), or 24 (truecolor).
+
+    :return: Semicolon separated color codes, e.g. '38;2;255;136;0', '38;5;208', or '91'.
+    :rtype: str
+    """
+    prefix = '48' if background else '38'
+    if rgb is not None and depth >= 24:
+        return '{0};2;{1};{2};{3}'.format(prefix, *rgb)
+    if depth >= 8:
+        return '{0};5;{1}'.format(prefix, nearest_256(rgb) if index is None else index)
+    if index is None:
+        index = nearest_16(rgb)
+    elif index >= 16:
+        index = nearest_16(PALETTE_256[index])
+    return str(basic_code(index, background))
@@ -2,16 +2,132 @@
 
 import re
 
-from colorclass.codes import ANSICodeMapping, BASE_CODES
+from colorclass.codes import ANSICodeMapping, BASE_CODES, extended_tag_codes, link_tag_control, RE_TAG, TAG_CODES
 
 CODE_GROUPS = (
     tuple(set(str(i) for i in BASE_CODES.values() if i and (40 <= i <= 49 or 100 <= i <= 109))),  # bg colors
     tuple(set(str(i) for i in BASE_CODES.values() if i and (30 <= i <= 39 or 90 <= i <= 99))),  # fg colors
     ('1', '22'), ('2', '22'), ('3', '23'), ('4', '24'), ('5', '25'), ('6', '26'), ('7', '27'), ('8', '28'), ('9', '29'),
 )
+CODE_GROUP_INDEXES = dict(  # Keys are codes, values are indexes of the CODE_GROUPS they belong to, e.g. '22': (2, 3).
+    (c, tuple(i for i, g in enumerate(CODE_GROUPS) if c in g)) for c in set(c for g in CODE_GROUPS for c in g)
+)
+RESET_STATE = dict((i, '49' if i == 0 else '39' if i == 1 else g[1]) for i, g in enumerate(CODE_GROUPS))  # After '0'.
+RESET_CODES = frozenset(RESET_STATE.values())  # Codes of the default style.
+CONTROL = (  # Any CSI (final bytes '{' and '}' excluded, they start and end tags) or OSC escape sequence.
+    r'\033\[[0-?]*[ -/]*[@-z|~]|\033\][^\007\033]*(?:\007|\033\\)'
+)
 RE_ANSI = re.compile(r'(\033\[([\d;]+)m)')
-RE_COMBINE = re.compile(r'\033\[([\d;]+)m\033\[([\d;]+)m')
-RE_SPLIT = re.compile(r'(\033\[[\d;]+m)')
+RE_SPLIT = re.compile('(' + CONTROL + ')')
+RE_TOKENS = re.compile(r'{(?P<tag>[^{}\033]+)}|\033\[(?P<codes>[\d;]*)m|(?P<control>' + CONTROL + ')')
+RE_TOKENS_KEEP_TAGS = re.compile(r'\033\[(?P<codes>[\d;]*)m|(?P<control>' + CONTROL + ')')
+TAG_DELIMITERS = ('{', '}')
+SCANNERS = {TAG_DELIMITERS: (RE_TOKENS, RE_TAG)}  # Keys are tag delimiters, see scanners().
+REDUCED_CODES = dict()  # Cache for combine_codes(). Few distinct combinations show up in practice.
+REDUCED_CODES_MAX = 1024
+REDUCED_CODES_MAX_RUN = 16  # Don't cache combinations of longer runs of escape sequences.
+
+
+def scanners(delimiters):
+    """Compile regular expressions matching color tags between custom delimiters, once per pair of delimiters.
+
+    :raise ValueError: On empty delimiters or ones with escape characters.
+
+    :param tuple delimiters: Opening and closing string of tags, e.g. ('[[', ']]').
+
+    :return: 2-item tuple: RE_TOKENS and RE_TAG equivalents.
+    :rtype: tuple
+    """
+    try:
+        return SCANNERS[delimiters]
+    except KeyError:
+        pass
+    opening, closing = delimiters
+    if not opening or not closing or '\033' in opening + closing:
+        raise ValueError('Invalid tag delimiters: {0!r}'.format(delimiters))
+    excluded = ''.join(re.escape(c) for c in sorted(set(opening + closing)))  # Tags never contain delimiters.
+    tag = r'{0}(?P<tag>[^{1}\033]+){2}'.format(re.escape(opening), excluded, re.escape(closing))
+    SCANNERS[delimiters] = re.compile(tag + r'|\033\[(?P<codes>[\d;]*)m|(?P<control>' + CONTROL + ')'), re.compile(tag)
+    return SCANNERS[delimiters]
+
+
+class Control(type(u'')):
+    """Zero-width escape sequence other than colors, such as cursor movement or a hyperlink. Yielded by tokenize()."""
+
+
+class Tag(type(u'')):
+    """Color tag name yielded by tokenize() instead of its color codes, resolved later by render_runs()."""
+
+
+def split_codes(codes):
+    """Split semicolon separated color codes, keeping 256-color and truecolor codes such as '38;5;208' together.
+
+    :param str codes: Semicolon separated color codes of one escape sequence (e.g. '1;38;2;255;136;0').
+
+    :return: List of color codes (e.g. ['1', '38;2;255;136;0']).
+    :rtype: list
+    """
+    split = codes.split(';')
+    if '38' not in split and '48' not in split:
+        return split
+    result = list()
+    i = 0
+    while i < len(split):
+        size = 1
+        if split[i] in ('38', '48') and i + 1 < len(split):
+            size = 3 if split[i + 1] == '5' else 5 if split[i + 1] == '2' else 1
+        result.append(';'.join(split[i:i + size]))
+        i += size
+    return result
+
+
+def code_groups(code):
+    """Return the indexes of the CODE_GROUPS a color code belongs to, including 256-color and truecolor codes.
+
+    :param str code: One color code from split_codes().
+
+    :return: Tuple of indexes, empty for unknown codes.
+    :rtype: tuple
+    """
+    groups = CODE_GROUP_INDEXES.get(code)
+    if groups is None:
+        groups = (0,) if code.startswith('48;') else (1,) if code.startswith('38;') else ()
+    return groups
+
+
+def code_sort_key(code):
+    """Sort color codes numerically, 256-color and truecolor codes by their first number.
+
+    :param str code: One color code from split_codes().
+
+    :return: Sort key.
+    :rtype: int
+    """
+    return int(code.partition(';')[0])
+
+
+def reduce_codes(codes):
+    """Remove color codes that are rendered ineffective by subsequent codes in one escape sequence then sort codes.
+
+    Walks the codes once from last to first, so combining a long run of escape sequences stays linear.
+
+    :param str codes: Semicolon separated color codes of one escape sequence (e.g. '31;32;1').
+
+    :return: Semicolon separated remaining color codes.
+    :rtype: str
+    """
+    r_codes = list()
+    decided = set()  # Indexes of CODE_GROUPS already claimed by a subsequent code.
+    for code in reversed(split_codes(codes)):
+        for group in CODE_GROUP_INDEXES.get(code) or code_groups(code):
+            if group in decided:
+                break  # Overridden by a subsequent code.
+            decided.add(group)
+        else:
+            r_codes.append(code)
+            if code == '0':
+                break  # Nuke everything before {/all}.
+    return ';'.join(sorted(r_codes, key=code_sort_key))
 
 
 def prune_overridden(ansi_string):
@@ -24,73 +140,371 @@ def prune_overridden(ansi_string):
     """
     multi_seqs = set(p for p in RE_ANSI.findall(ansi_string) if ';' in p[1])  # Sequences with multiple color codes.
 
-    for escape, codes in multi_seqs:
-        r_codes = list(reversed(codes.split(';')))
+    for sequence, codes in multi_seqs:
+        reduced_codes = reduce_codes(codes)
+        if codes != reduced_codes:
+            ansi_string = ansi_string.replace(sequence, '\033[' + reduced_codes + 'm')
+
+    return ansi_string
 
-        # Nuke everything before {/all}.
-        try:
-            r_codes = r_codes[:r_codes.index('0') + 1]
-        except ValueError:
-            pass
 
-        # Thin out groups.
-        for group in CODE_GROUPS:
-            for pos in reversed([i for i, n in enumerate(r_codes) if n in group][1:]):
-                r_codes.pop(pos)
+def combine_codes(pending):
+    """Combine the color codes of adjacent escape sequences into the codes of one pruned escape sequence.
 
-        # Done.
-        reduced_codes = ';'.join(sorted(r_codes, key=int))
-        if codes != reduced_codes:
-            ansi_string = ansi_string.replace(escape, '\033[' + reduced_codes + 'm')
+    :param list pending: Color codes (str) of each adjacent escape sequence, in order.
 
-    return ansi_string
+    :return: Semicolon separated color codes.
+    :rtype: str
+    """
+    if len(pending) == 1 and ';' not in pending[0]:
+        return pending[0]
+    codes = ';'.join(pending)
+    try:
+        return REDUCED_CODES[codes]
+    except KeyError:
+        pass
+    reduced = reduce_codes(codes)
+    if len(pending) <= REDUCED_CODES_MAX_RUN:
+        if len(REDUCED_CODES) >= REDUCED_CODES_MAX:
+            REDUCED_CODES.clear()
+        REDUCED_CODES[codes] = reduced
+    return reduced
+
+
+def apply_codes(state, codes):
+    """Apply pruned codes of one escape sequence to the terminal style state, keeping only codes that change it.
+
+    :param dict state: Active code of each CODE_GROUPS index, unknown groups are missing. Updated in place.
+    :param str codes: Semicolon separated color codes from combine_codes().
 
+    :return: Semicolon separated color codes, empty if none of them change the state.
+    :rtype: str
+    """
+    changed = list()
+    for code in (split_codes(codes) if '8;' in codes else codes.split(';')):
+        groups = CODE_GROUP_INDEXES.get(code) or code_groups(code)
+        if not groups:
+            if code == '0':
+                if state == RESET_STATE:
+                    continue
+                state.update(RESET_STATE)
+            else:
+                state.clear()  # Unknown code, could change anything.
+        else:
+            for group in groups:
+                if state.get(group) != code:
+                    break
+            else:
+                continue  # Already active.
+            for group in groups:
+                state[group] = code
+        changed.append(code)
+    return ';'.join(changed)
+
+
+def tokenize(value, codes, keep_tags, delimiters=TAG_DELIMITERS, escapes=False):
+    """Split a string into text segments, each preceded by the color codes of the tags and escape sequences before it.
+
+    :param str value: String with color tags and/or ANSI escape sequences.
+    :param dict codes: Color code strings of tags (e.g. TAG_CODES[False]). None to yield Tag instances instead.
+    :param bool keep_tags: Skip parsing curly bracket tags.
+    :param tuple delimiters: Opening and closing string of tags.
+    :param bool escapes: Backslashes before tags escape them, see escape().
+
+    :return: Yields 2-item tuples: list of color codes (str) and the text segment. Last text segment may be empty.
+        Other escape sequences are yielded as Control instances instead of text, never combined with anything. Text
+        segments may follow each other when tags are escaped.
+    :rtype: iter
+    """
+    names = codes is None
+    if names:
+        codes = TAG_CODES[False]  # Only to tell color tags from other text, light and dark tags are the same.
+    pending = list()
+    position = 0
+    for match in (RE_TOKENS_KEEP_TAGS if keep_tags else scanners(delimiters)[0]).finditer(value):
+        control = None
+        if match.lastgroup == 'tag':
+            start = match.start()
+            if escapes and start > position and value[start - 1] == '\\':
+                text = value[position:start]
+                stripped = text.rstrip('\\')
+                backslashes = len(text) - len(stripped)
+                text = stripped + '\\' * (backslashes // 2)
+                if text:
+                    yield pending, text
+                    pending = list()
+                position = start
+                if backslashes % 2:
+                    continue  # Escaped, leave the tag in the text.
+            item = codes.get(match.group('tag'))
+            if item is None:
+                item = extended_tag_codes(match.group('tag'), codes)
+                if item is None:
+                    control = link_tag_control(match.group('tag'))
+                    if control is None:
+                        continue  # Not a color tag, leave it in the text.
+            if names and control is None:
+                item = Tag(match.group('tag'))
+        elif match.lastgroup == 'codes':
+            item = match.group('codes')
+            if not item or item[0] == ';' or item[-1] == ';' or ';;' in item:
+                item = ';'.join(c or '0' for c in item.split(';'))  # Empty codes are resets, e.g. '\033[m'.
+        else:
+            control = match.group('control')
+        start = match.start()
+        if start != position:
+            yield pending, value[position:start]
+            pending = list()
+        if control is None:
+            pending.append(item)
+        else:
+            yield pending, Control(control)
+            pending = list()
+        position = match.end()
+    yield pending, value[position:]
+
+
+def render_tokens(tokens, disable_colors, no_colors=True, opening=None):
+    """Join tokenize() output into colored and plain strings.
+
+    Adjacent escape sequences are combined into one pruned escape sequence. The terminal style state is tracked across
+    the whole string and only codes that change it are emitted, starting with an unknown state so the output is correct
+    wherever it's printed. Other escape sequences are zero-width, left out of the output without any colors.
+
+    Text with tags left in it, escaped or kept with keep_tags, may be parsed again later and change the style there.
+    The state is unknown again after such text, so codes following it are kept.
+
+    :param iter tokens: 2-item tuples of color codes and text, like tokenize() yields.
+    :param bool disable_colors: Strip all colors in both outputs.
+    :param bool no_colors: Build the output without colors. Otherwise the second item is None, unless colors are
+        disabled.
+    :param str opening: Opening delimiter of tags. None if text can't have tags.
 
-def parse_input(tagged_string, disable_colors, keep_tags):
+    :return: 2-item tuple. First item is the colored output. Second item is the output without any colors.
+    :rtype: tuple
+    """
+    no_colors = no_colors or disable_colors
+    output_colors = list()
+    output_no_colors = list()
+    state = dict()
+    previous = None
+    for pending, text in tokens:
+        if pending and not disable_colors:
+            reduced = combine_codes(pending)
+            if reduced != previous:  # Checked first since it also covers codes apply_codes() knows nothing about.
+                previous = reduced
+                changed = apply_codes(state, reduced)
+                if changed:
+                    output_colors.append('\033[' + changed + 'm')
+        if text.__class__ is Control:
+            if not disable_colors:
+                output_colors.append(text)
+                if text[1] == '[':  # Other CSI sequences may change the style, e.g. soft reset.
+                    state.clear()
+                    previous = None
+        elif text:
+            output_colors.append(text)
+            if no_colors:
+                output_no_colors.append(text)
+            if opening is not None and opening in text:
+                state.clear()
+                previous = None
+
+    if disable_colors:
+        output_no_colors = ''.join(output_no_colors)
+        return output_no_colors, output_no_colors
+    return ''.join(output_colors), ''.join(output_no_colors) if no_colors else None
+
+
+def parse_runs(tagged_string, keep_tags, delimiters=TAG_DELIMITERS, escapes=False):
+    """Parse color markup into runs that can be rendered with any toggles, see render_runs().
+
+    Tags are left unresolved since their codes depend on LIGHT_BACKGROUND and COLOR_DEPTH. Which tags exist depends on
+    the theme, so runs must be parsed again after changing it.
+
+    :param str tagged_string: The input unicode value.
+    :param bool keep_tags: Skip parsing curly bracket tags.
+    :param tuple delimiters: Opening and closing string of tags.
+    :param bool escapes: Backslashes before tags escape them, see escape().
+
+    :return: Tuple of 2-item tuples: tuple of color codes (str) and Tag instances, and the text segment or Control.
+    :rtype: tuple
+    """
+    value = getattr(tagged_string, 'value_colors', tagged_string)
+    return tuple((tuple(p), t) for p, t in tokenize(value, None, keep_tags, delimiters, escapes))
+
+
+def render_runs(runs, disable_colors, no_colors=True, delimiters=TAG_DELIMITERS):
+    """Render parse_runs() output with the current LIGHT_BACKGROUND and COLOR_DEPTH, without parsing markup again.
+
+    Returns the same as parse_input() would with the markup runs were parsed from.
+
+    :param tuple runs: Output of parse_runs().
+    :param bool disable_colors: Strip all colors in both outputs.
+    :param bool no_colors: Build the output without colors. Otherwise the second item is None, unless colors are
+        disabled.
+    :param tuple delimiters: Opening and closing string of tags.
+
+    :return: 2-item tuple. First item is the colored output. Second item is the output without any colors.
+    :rtype: tuple
+    """
+    if disable_colors:  # Like strip_input(), text joined around tags may form new escape sequences.
+        output_no_colors = ''.join(t for _, t in runs if t.__class__ is not Control)
+        if '\033' in output_no_colors:
+            output_no_colors = RE_SPLIT.sub('', output_no_colors)
+        return output_no_colors, output_no_colors
+    codes = TAG_CODES[ANSICodeMapping.LIGHT_BACKGROUND]
+    tokens = (
+        ([(codes.get(i) or extended_tag_codes(i, codes)) if i.__class__ is Tag else i for i in p], t) for p, t in runs
+    )
+    return render_tokens(tokens, False, no_colors, delimiters[0])
+
+
+def style_runs(ansi_string):
+    """Split a string with escape sequences into runs of text with the same style.
+
+    :param str ansi_string: String with color codes (ANSI escape sequences), e.g. from parse_input().
+
+    :return: Yields 2-item tuples: active color codes (tuple of str sorted like reduce_codes(), e.g. ('1', '31'),
+        empty for the default style) and text. Other escape sequences are yielded as Control instances.
+    :rtype: iter
+    """
+    state = dict()
+    style = ()
+    texts = list()
+    for pending, text in tokenize(getattr(ansi_string, 'value_colors', ansi_string), None, True):
+        if pending:
+            apply_codes(state, combine_codes(pending))
+            changed = tuple(sorted(set(c for c in state.values() if c not in RESET_CODES), key=code_sort_key))
+            if changed != style:
+                if texts:
+                    yield style, ''.join(texts)
+                    texts = list()
+                style = changed
+        if text.__class__ is Control:
+            if texts:
+                yield style, ''.join(texts)
+                texts = list()
+            yield style, text
+        elif text:
+            texts.append(text)
+    if texts:
+        yield style, ''.join(texts)
+
+
+def strip_input(tagged_string, keep_tags, delimiters=TAG_DELIMITERS, escapes=False):
+    """Remove color tags and escape sequences in one pass, for when colors are disabled.
+
+    :param str tagged_string: The input unicode value.
+    :param bool keep_tags: Skip removing curly bracket tags.
+    :param tuple delimiters: Opening and closing string of tags.
+    :param bool escapes: Backslashes before tags escape them, see escape().
+
+    :return: The input without any colors.
+    :rtype: str
+    """
+    value = getattr(tagged_string, 'value_colors', tagged_string)
+    if keep_tags:
+        return RE_SPLIT.sub('', value)
+    codes = TAG_CODES[False]
+    re_tokens, re_tag = scanners(delimiters)
+    if escapes and '\\' in value:  # Backslashes may escape tags, see tokenize().
+        output = ''.join(t for _, t in tokenize(value, codes, False, delimiters, True) if t.__class__ is not Control)
+        return RE_SPLIT.sub('', output) if '\033' in output else output
+
+    def is_tag(name):
+        """Return True if name is a color tag or a combination of them."""
+        return name in codes or extended_tag_codes(name, codes) is not None or link_tag_control(name) is not None
+
+    output = re_tokens.sub(lambda m: m.group() if m.lastgroup == 'tag' and not is_tag(m.group(1)) else '', value)
+
+    # Text on both sides of a removed tag may form a new escape sequence: '\033[3{b}1m' -> '\033[31m'.
+    if '\033' in output:
+        output = RE_SPLIT.sub('', re_tag.sub(lambda m: '' if is_tag(m.group(1)) else m.group(), value))
+    return output
+
+
+def escape(text, delimiters=TAG_DELIMITERS):
+    """Escape tags in text with backslashes so parsing it as markup yields the text as-is.
+
+    A backslash before a tag leaves the tag in the text, two backslashes become one. Backslashes at the end of text are
+    doubled too, in case a tag follows it. Only classes with ESCAPE_TAGS set parse backslashes this way, see
+    colorclass.core.ColorStr.
+
+    :param str text: Text to insert into color markup, such as user input.
+    :param tuple delimiters: Opening and closing string of tags.
+
+    :return: Escaped text.
+    :rtype: str
+    """
+    text = getattr(text, 'value_colors', text)  # escape_tag() indexes the raw string.
+    if delimiters[0] in text:
+        text = scanners(delimiters)[1].sub(escape_tag, text)
+    if text.endswith('\\'):
+        text += '\\' * (len(text) - len(text.rstrip('\\')))
+    return text
+
+
+def escape_tag(match):
+    """Escape one tag and double the backslashes before it. Called by escape().
+
+    :param match: Regular expression match of a tag.
+
+    :return: Tag with backslashes to add before it.
+    :rtype: str
+    """
+    string = match.string
+    start = end = match.start()
+    while end and string[end - 1] == '\\':
+        end -= 1
+    return '\\' * (start - end + 1) + match.group()
+
+
+def parse_input(tagged_string, disable_colors, keep_tags, delimiters=TAG_DELIMITERS, no_colors=True, escapes=False):
     """Perform the actual conversion of tags to ANSI escaped codes.
 
     Provides a version of the input without any colors for len() and other methods.
 
+    Tags and escape sequences are handled in one scan of the input, see render_tokens() for how escape sequences are
+    combined.
+
     :param str tagged_string: The input unicode value.
     :param bool disable_colors: Strip all colors in both outputs.
     :param bool keep_tags: Skip parsing curly bracket tags into ANSI escape sequences.
+    :param tuple delimiters: Opening and closing string of tags.
+    :param bool no_colors: Build the version without colors. Otherwise the second item is None, unless colors are
+        disabled.
+    :param bool escapes: Backslashes before tags escape them, see escape().
 
     :return: 2-item tuple. First item is the parsed output. Second item is a version of the input without any colors.
     :rtype: tuple
     """
-    codes = ANSICodeMapping(tagged_string)
-    output_colors = getattr(tagged_string, 'value_colors', tagged_string)
-
-    # Convert: '{b}{red}' -> '\033[1m\033[31m'
-    if not keep_tags:
-        for tag, replacement in (('{' + k + '}', '' if v is None else '\033[%dm' % v) for k, v in codes.items()):
-            output_colors = output_colors.replace(tag, replacement)
-
-    # Strip colors.
-    output_no_colors = RE_ANSI.sub('', output_colors)
     if disable_colors:
+        output_no_colors = strip_input(tagged_string, keep_tags, delimiters, escapes)
         return output_no_colors, output_no_colors
+    value = getattr(tagged_string, 'value_colors', tagged_string)
+    codes = TAG_CODES[ANSICodeMapping.LIGHT_BACKGROUND]
+    return render_tokens(tokenize(value, codes, keep_tags, delimiters, escapes), False, no_colors, delimiters[0])
 
-    # Combine: '\033[1m\033[31m' -> '\033[1;31m'
-    while True:
-        simplified = RE_COMBINE.sub(r'\033[\1;\2m', output_colors)
-        if simplified == output_colors:
-            break
-        output_colors = simplified
-
-    # Prune: '\033[31;32;33;34;35m' -> '\033[35m'
-    output_colors = prune_overridden(output_colors)
-
-    # Deduplicate: '\033[1;mT\033[1;mE\033[1;mS\033[1;mT' -> '\033[1;mTEST'
-    previous_escape = None
-    segments = list()
-    for item in (i for i in RE_SPLIT.split(output_colors) if i):
-        if RE_SPLIT.match(item):
-            if item != previous_escape:
-                segments.append(item)
-                previous_escape = item
-        else:
-            segments.append(item)
-    output_colors = ''.join(segments)
 
-    return output_colors, output_no_colors
+def parse_input_bytes(tagged_bytes, disable_colors, keep_tags, delimiters=TAG_DELIMITERS, escapes=False):
+    """Like parse_input() for UTF-8 (or any ASCII compatible encoding) bytes, without decoding them.
+
+    Bytes are mapped one to one to code points with latin-1, which multi-byte sequences pass through untouched since all
+    their bytes are non-ASCII. Tags and delimiters must be ASCII.
+
+    :param tagged_bytes: The input bytes, bytearray, or memoryview.
+    :param bool disable_colors: Strip all colors in both outputs.
+    :param bool keep_tags: Skip parsing curly bracket tags into ANSI escape sequences.
+    :param tuple delimiters: Opening and closing string of tags.
+    :param bool escapes: Backslashes before tags escape them, see escape().
+
+    :return: 2-item tuple of bytes. First item is the parsed output. Second item is the output without any colors.
+    :rtype: tuple
+    """
+    value = tagged_bytes.tobytes() if hasattr(tagged_bytes, 'tobytes') else bytes(tagged_bytes)
+    if b'\033' not in value and (keep_tags or delimiters[0].encode('ascii') not in value):
+        return value, value
+    output_colors, output_no_colors = parse_input(value.decode('latin-1'), disable_colors, keep_tags, delimiters,
+                                                  escapes=escapes)
+    return output_colors.encode('latin-1'), output_no_colors.encode('latin-1')
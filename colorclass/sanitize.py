@@ -0,0 +1,48 @@
+"""Remove or escape control characters and escape sequences in untrusted text."""
+
+import re
+
+SGR = r'\033\[[\d;]*m'
+UNSAFE = (  # 7-bit and 8-bit escape sequences, then any other C0 and C1 control characters except tab and newline.
+    r'(?:\033\[|\x9b)[0-?]*[ -/]*[@-~]'  # CSI.
+    r'|(?:\033[\]PX^_]|[\x90\x98\x9d-\x9f])[^\007\033\x9c]*(?:\007|\033\\|\x9c|(?=\033)|$)'  # OSC, DCS, SOS, PM, APC.
+    r'|\033[ -/]*[0-~]'  # Other escape sequences.
+    r'|[\x00-\x08\x0b-\x1f\x7f-\x9f]'
+)
+CONTROL = r'[\x00-\x08\x0b-\x1f\x7f-\x9f]'
+RE_UNSAFE = {  # Keys are keep_colors and escape arguments of sanitize().
+    (False, False): re.compile(UNSAFE),
+    (True, False): re.compile(r'(?!{0})(?:{1})'.format(SGR, UNSAFE)),
+    (False, True): re.compile(CONTROL),
+    (True, True): re.compile(r'(?!{0}){1}'.format(SGR, CONTROL)),
+}
+
+
+def escape_control(match):
+    """Replace a control character with its escaped representation, e.g. '\\x1b'.
+
+    :param match: Regular expression match of one control character.
+
+    :return: Escaped control character.
+    :rtype: str
+    """
+    return '\\x{0:02x}'.format(ord(match.group()))
+
+
+def sanitize(text, keep_colors=False, escape=False):
+    """Remove escape sequences and control characters from untrusted text, in one pass.
+
+    Tabs and newlines are kept. Color tags are not touched, use Color.from_untrusted() to keep them as text.
+
+    :param str text: Untrusted text.
+    :param bool keep_colors: Keep escape sequences that only set colors and styles, e.g. '\\033[1;31m'.
+    :param bool escape: Make control characters visible, e.g. '\\x1b[2J', instead of removing them along with their
+        escape sequences.
+
+    :return: Sanitized text.
+    :rtype: str
+    """
+    pattern = RE_UNSAFE[(bool(keep_colors), bool(escape))]
+    if escape:
+        return pattern.sub(escape_control, text)
+    return pattern.sub('', text)
@@ -1,6 +1,358 @@
 """Determine color of characters that may or may not be adjacent to ANSI escape sequences."""
 
-from colorclass.parse import RE_SPLIT
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from colorclass.codes import BASE_CODES
+from colorclass.parse import (
+    apply_codes, CODE_GROUPS, code_groups, code_sort_key, combine_codes, Control, RE_SPLIT, RESET_CODES, RESET_STATE,
+    split_codes, tokenize,
+)
+
+PARENT_CLASS = type(u'')
+CHECKPOINT_RUNS = 64  # Runs between checkpoints of ColorIndex.codes_before().
+FLAG_NAMES = dict((str(v), k) for k, v in BASE_CODES.items() if v and v <= 9)  # Keys are codes, values are tags.
+LINK_CLOSE = '\033]8;;\033\\'  # Ends an OSC 8 hyperlink, like the /link tag.
+Style = namedtuple('Style', 'fg bg flags')  # Returned by codes_style().
+
+
+class ColorIndex(object):
+    """Index between visible characters and a string with invisible color codes, one entry per run of visible text.
+
+    Behaves like a tuple of the position of every visible character in the color string, but memory grows with the
+    number of escape sequences instead of the length of the string. Runs are stored in arrays of machine integers
+    instead of tuples of int objects. Positions are looked up with a binary search.
+
+    :ivar array visible_starts: Position of each run in the string without colors.
+    :ivar array raw_starts: Position of each run in the color string.
+    :ivar array lengths: Length of each run.
+    :ivar str escapes: All escape sequences of the color string joined together.
+    :ivar tuple links: Position of each OSC 8 hyperlink escape sequence in escapes and the hyperlink open after it, see
+        link_state(). None if there are none.
+    """
+
+    __slots__ = ('_checkpoints', 'escapes', 'lengths', 'links', 'raw_starts', 'visible_starts')
+
+    def __init__(self, ansi_string):
+        """Constructor.
+
+        :param str ansi_string: String with color codes (ANSI escape sequences).
+        """
+        visible_starts = array('l')
+        raw_starts = array('l')
+        lengths = array('l')
+        escapes = list()
+        links = None
+        visible = 0
+        position = 0
+        for match in RE_SPLIT.finditer(ansi_string) if '\033' in ansi_string else ():
+            start = match.start()
+            if start != position:
+                visible_starts.append(visible)
+                raw_starts.append(position)
+                lengths.append(start - position)
+                visible += start - position
+            escape = match.group()
+            link = link_state(escape)
+            if link is not None:
+                if links is None:
+                    links = (array('l'), list())
+                links[0].append(start - visible)
+                links[1].append(link)
+            escapes.append(escape)
+            position = match.end()
+        if position != len(ansi_string):
+            visible_starts.append(visible)
+            raw_starts.append(position)
+            lengths.append(len(ansi_string) - position)
+        self.visible_starts = visible_starts
+        self.raw_starts = raw_starts
+        self.lengths = lengths
+        self.escapes = ''.join(escapes)
+        self.links = links
+        self._checkpoints = None
+
+    def __eq__(self, other):
+        """Compare with another index, or with a tuple or list of positions."""
+        if isinstance(other, ColorIndex):
+            return self.raw_starts == other.raw_starts and self.lengths == other.lengths
+        if isinstance(other, (tuple, list)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        """Inverse of __eq__() for Python 2."""
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None  # Equal to tuples, which hash differently.
+
+    def __getitem__(self, item):
+        """Position of a visible character in the color string.
+
+        :param int item: Position of the character in the string without colors. Slices return a tuple.
+        """
+        if isinstance(item, slice):
+            return tuple(self)[item]
+        size = len(self)
+        item = int(item)
+        if item < 0:
+            item += size
+        if not 0 <= item < size:
+            raise IndexError('color index out of range')
+        run = bisect_right(self.visible_starts, item) - 1
+        return self.raw_starts[run] + item - self.visible_starts[run]
+
+    def __iter__(self):
+        """Yield the position of every visible character in the color string."""
+        for raw_start, length in zip(self.raw_starts, self.lengths):
+            for position in range(raw_start, raw_start + length):
+                yield position
+
+    def __len__(self):
+        """Number of visible characters."""
+        return self.visible_starts[-1] + self.lengths[-1] if self.lengths else 0
+
+    def __repr__(self):
+        """Representation of a class instance."""
+        return '{name}({runs})'.format(name=self.__class__.__name__, runs=list(zip(self.raw_starts, self.lengths)))
+
+    def find_run(self, item):
+        """Return the run of a visible character.
+
+        :param int item: Position of the character in the string without colors, 0 <= item < len(self).
+
+        :return: Index in visible_starts, raw_starts, and lengths.
+        :rtype: int
+        """
+        return bisect_right(self.visible_starts, item) - 1
+
+    def codes_before(self, run):
+        """Combine the color codes of all escape sequences before a run, like combine_codes() does.
+
+        Codes are combined from the nearest checkpoint, every CHECKPOINT_RUNS runs. Checkpoints are built on first use.
+
+        :param int run: Index in visible_starts, raw_starts, and lengths.
+
+        :return: Semicolon separated color codes, e.g. '1;31'. Empty if there are none.
+        :rtype: str
+        """
+        if self._checkpoints is None:
+            checkpoints = list()
+            codes = ''
+            offset = 0
+            for checkpoint in range(0, len(self.lengths), CHECKPOINT_RUNS):
+                skipped = self.raw_starts[checkpoint] - self.visible_starts[checkpoint]
+                codes = add_codes(codes, self.escapes[offset:skipped])
+                checkpoints.append(codes)
+                offset = skipped
+            self._checkpoints = checkpoints
+        checkpoint = run // CHECKPOINT_RUNS * CHECKPOINT_RUNS
+        offset = self.raw_starts[checkpoint] - self.visible_starts[checkpoint]
+        skipped = self.raw_starts[run] - self.visible_starts[run]
+        return add_codes(self._checkpoints[run // CHECKPOINT_RUNS], self.escapes[offset:skipped])
+
+    def link_before(self, run):
+        """Return the hyperlink open before a run.
+
+        :param int run: Index in visible_starts, raw_starts, and lengths.
+
+        :return: OSC 8 escape sequence opening the hyperlink. Empty if none is open.
+        :rtype: str
+        """
+        if self.links is None:
+            return ''
+        previous = bisect_left(self.links[0], self.raw_starts[run] - self.visible_starts[run]) - 1
+        return self.links[1][previous] if previous >= 0 else ''
+
+
+def link_state(escape):
+    """Return the hyperlink open after an escape sequence, if it's an OSC 8 hyperlink.
+
+    :param str escape: Escape sequence other than colors, e.g. a Control yielded by tokenize().
+
+    :return: The escape sequence if it opens a hyperlink, empty if it ends one, None if it's not a hyperlink.
+    :rtype: str
+    """
+    if not escape.startswith('\033]8;'):
+        return None
+    uri = escape[4:-2 if escape.endswith('\\') else -1].partition(';')[2]
+    return escape if uri else ''
+
+
+def wrap_link(text, link):
+    """Put text inside a hyperlink, leaving it as is without one.
+
+    :param str text: Text, may have escape sequences of its own.
+    :param str link: OSC 8 escape sequence opening the hyperlink, e.g. from link_state(). Empty for none.
+
+    :return: Text with escape sequences.
+    :rtype: str
+    """
+    return link + text + LINK_CLOSE if link else text
+
+
+def add_codes(codes, ansi_string):
+    """Combine color codes with the ones of all escape sequences in a string, like combine_codes() does.
+
+    :param str codes: Semicolon separated color codes, may be empty.
+    :param str ansi_string: String with color codes (ANSI escape sequences).
+
+    :return: Semicolon separated color codes.
+    :rtype: str
+    """
+    if '\033' not in ansi_string:
+        return codes
+    for pending, _ in tokenize(ansi_string, None, True):
+        if pending:
+            codes = combine_codes([codes] + pending if codes else pending)
+    return codes
+
+
+def active_codes(codes):
+    """Return the codes that set a style other than the default, leaving out resets.
+
+    :param str codes: Semicolon separated color codes from combine_codes().
+
+    :return: Semicolon separated color codes, e.g. '1;31'.
+    :rtype: str
+    """
+    return ';'.join(c for c in split_codes(codes) if c != '0' and c not in RESET_CODES) if codes else ''
+
+
+def closing_codes(codes):
+    """Return the codes that reset the styles set by color codes back to the default.
+
+    :param str codes: Semicolon separated color codes from combine_codes().
+
+    :return: Semicolon separated color codes, e.g. '22;39'. '0' if some codes are unknown.
+    :rtype: str
+    """
+    closing = set()
+    for code in split_codes(codes) if codes else ():
+        groups = code_groups(code)
+        if not groups:
+            if code != '0':
+                return '0'  # Unknown code, only a full reset is sure to undo it.
+        elif code not in RESET_CODES:
+            closing.update(RESET_STATE[g] for g in groups)
+    return ';'.join(sorted(closing, key=code_sort_key))
+
+
+def change_codes(previous, active):
+    """Return the codes that switch from one style to another.
+
+    :param str previous: Semicolon separated color codes of the current style, from active_codes().
+    :param str active: Semicolon separated color codes of the next style, from active_codes().
+
+    :return: Semicolon separated color codes.
+    :rtype: str
+    """
+    closing = closing_codes(previous)
+    if not closing:
+        return active
+    if not active:
+        return closing
+    if closing == '0' or '22' in closing.split(';') and set(active.split(';')) & set(('1', '2')):
+        return '0;' + active  # Resetting bold or dim resets both, and sorting would put '22' after them.
+    return closing + ';' + active
+
+
+def codes_style(codes):
+    """Describe the style set by color codes.
+
+    :param str codes: Semicolon separated color codes from combine_codes().
+
+    :return: Foreground and background codes (e.g. '31' or '38;5;208', None for the default color) and a frozenset of
+        attribute tags (e.g. 'b' and 'u').
+    :rtype: Style
+    """
+    state = dict()
+    if codes:
+        apply_codes(state, codes)
+    fg, bg = state.get(1), state.get(0)
+    return Style(
+        None if fg in RESET_CODES else fg,
+        None if bg in RESET_CODES else bg,
+        frozenset(FLAG_NAMES[state[i]] for i in range(2, len(CODE_GROUPS)) if state.get(i) == CODE_GROUPS[i][0]),
+    )
+
+
+def wrap_codes(text, opening, closing):
+    """Put text between escape sequences of color codes, leaving out empty ones.
+
+    :param str text: Text, may have escape sequences of its own.
+    :param str opening: Semicolon separated color codes before text.
+    :param str closing: Semicolon separated color codes after text.
+
+    :return: Text with escape sequences.
+    :rtype: str
+    """
+    return ('\033[' + opening + 'm' if opening else '') + text + ('\033[' + closing + 'm' if closing else '')
+
+
+def slice_colors(ansi_string, start, stop, step, color_index=None):
+    """Cut visible characters out of a string, keeping their colors.
+
+    The result starts with the style and hyperlink active at the first character and ends with codes resetting the
+    styles and closing the hyperlink still active after the last one. With a step of 1, escape sequences between
+    characters are kept. Otherwise characters are joined along with just their colors and hyperlinks, leaving out other
+    escape sequences.
+
+    :param str ansi_string: String with color codes (ANSI escape sequences).
+    :param int start: Position of the first visible character, like slice.indices() returns.
+    :param int stop: Position after the last visible character.
+    :param int step: Step between characters, may be negative.
+    :param ColorIndex color_index: Output of build_color_index(ansi_string). Built if None.
+
+    :return: String with color codes, to be parsed again to combine and prune adjacent escape sequences.
+    :rtype: str
+    """
+    if color_index is None:
+        color_index = build_color_index(ansi_string)
+    positions = range(start, stop, step)
+    if not positions:
+        return ''
+
+    # Copy the window between the first and last character.
+    first, last = min(positions[0], positions[-1]), max(positions[0], positions[-1])
+    run = color_index.find_run(first)
+    codes = color_index.codes_before(run)
+    link = color_index.link_before(run)
+    raw_start = color_index.raw_starts[run] + first - color_index.visible_starts[run]
+    raw_stop = color_index[last] + 1
+    if isinstance(ansi_string, PARENT_CLASS):
+        window = PARENT_CLASS.__getitem__(ansi_string, slice(raw_start, raw_stop))  # Also skips ColorStr.__getitem__().
+    else:
+        window = ansi_string[raw_start:raw_stop]  # Python 2 str.
+    if step == 1:
+        output = wrap_codes(window, active_codes(codes), closing_codes(add_codes(codes, window)))
+        if color_index.links is not None:
+            output = link + output + (LINK_CLOSE if color_index.link_before(color_index.find_run(last)) else '')
+        return output
+
+    # Pick characters out of the window along with their style and hyperlink.
+    styles = list()
+    for pending, text in tokenize(window, None, True):
+        if pending:
+            codes = combine_codes([codes] + pending if codes else pending)
+        if text.__class__ is not Control:
+            styles.extend((active_codes(codes), link, c) for c in text)
+        elif link_state(text) is not None:
+            link = link_state(text)
+    output = list()
+    previous = ''
+    previous_link = ''
+    for active, link, char in (styles[p - first] for p in positions):
+        if link != previous_link:
+            output.append(link or LINK_CLOSE)
+            previous_link = link
+        if active != previous:
+            output.append(wrap_codes('', change_codes(previous, active), ''))
+            previous = active
+        output.append(char)
+    return wrap_codes(''.join(output), '', closing_codes(previous)) + (LINK_CLOSE if previous_link else '')
 
 
 def build_color_index(ansi_string):
@@ -9,41 +361,57 @@ def build_color_index(ansi_string):
     :param str ansi_string: String with color codes (ANSI escape sequences).
 
     :return: Position of visible characters in color string (indexes match non-color string).
-    :rtype: tuple
+    :rtype: ColorIndex
     """
-    mapping = list()
-    color_offset = 0
-    for item in (i for i in RE_SPLIT.split(ansi_string) if i):
-        if RE_SPLIT.match(item):
-            color_offset += len(item)
-        else:
-            for _ in range(len(item)):
-                mapping.append(color_offset)
-                color_offset += 1
-    return tuple(mapping)
+    return ColorIndex(ansi_string)
 
 
-def find_char_color(ansi_string, pos):
+def find_char_color(ansi_string, pos, color_index=None):
     """Determine what color a character is in the string.
 
     :param str ansi_string: String with color codes (ANSI escape sequences).
     :param int pos: Position of the character in the ansi_string.
+    :param ColorIndex color_index: Output of build_color_index(ansi_string). Built if None.
 
     :return: Character along with all surrounding color codes.
     :rtype: str
     """
-    result = list()
-    position = 0  # Set to None when character is found.
-    for item in (i for i in RE_SPLIT.split(ansi_string) if i):
-        if RE_SPLIT.match(item):
-            result.append(item)
-            if position is not None:
-                position += len(item)
-        elif position is not None:
-            for char in item:
-                if position == pos:
-                    result.append(char)
-                    position = None
-                    break
-                position += 1
-    return ''.join(result)
+    if color_index is None:
+        color_index = build_color_index(ansi_string)
+    escapes = color_index.escapes
+    run = bisect_right(color_index.raw_starts, pos) - 1
+    if run < 0 or pos >= color_index.raw_starts[run] + color_index.lengths[run]:
+        return escapes  # Not a visible character.
+    skipped = color_index.raw_starts[run] - color_index.visible_starts[run]  # Escape sequence characters before pos.
+    return escapes[:skipped] + ansi_string[pos] + escapes[skipped:]
+
+
+def iter_char_colors(ansi_string):
+    """Yield every visible character wrapped in the color codes and hyperlink active at it, walking the string once.
+
+    Each character is the same as slicing it out one at a time: color codes before it are combined into one escape
+    sequence and followed by codes resetting the style, only keeping codes that change the style. Escape sequences
+    other than colors and hyperlinks, such as cursor movement, are left out.
+
+    :param str ansi_string: String with color codes (ANSI escape sequences), e.g. from parse_input().
+
+    :return: Yields 2-item tuples: character along with its color codes, and the character alone.
+    :rtype: iter
+    """
+    codes = ''
+    link = ''
+    for pending, text in tokenize(getattr(ansi_string, 'value_colors', ansi_string), None, True):
+        if pending:
+            codes = combine_codes([codes] + pending if codes else pending)
+        if text.__class__ is Control:
+            if link_state(text) is not None:
+                link = link_state(text)
+        elif text:
+            state = dict()
+            opening = apply_codes(state, codes) if codes else ''
+            closing = closing_codes(codes)
+            closing = apply_codes(state, closing) if closing else ''  # Like render_tokens().
+            prefix = link + wrap_codes('', opening, '')
+            suffix = wrap_codes('', '', closing) + (LINK_CLOSE if link else '')
+            for char in text:
+                yield prefix + char + suffix, char
@@ -0,0 +1,186 @@
+"""Color markup parsed once and rendered many times with different values."""
+
+from string import Formatter
+
+from colorclass.codes import ANSICodeMapping
+from colorclass.parse import Control, parse_runs, render_runs, render_tokens, tokenize
+
+FORMATTER = Formatter()
+TEMPLATES = dict()  # Templates of cached_template(). Keys are ColorStr subclasses and markup.
+TEMPLATES_MAX = 256
+
+
+def number_fields(format_string, counter):
+    """Replace automatically numbered fields ('{}') with explicit positions ('{0}'), including nested fields.
+
+    :raise ValueError: When automatic and manual numbering are mixed, like str.format().
+
+    :param str format_string: Format string to parse.
+    :param list counter: Next automatic position and whether manual numbering was seen. Updated in place.
+
+    :return: List of 4-item tuples like string.Formatter.parse() yields, with explicit field names.
+    :rtype: list
+    """
+    parsed = list()
+    for literal, field_name, format_spec, conversion in FORMATTER.parse(format_string):
+        if field_name is not None:
+            if not field_name or field_name[0] in '.[':
+                if counter[1]:
+                    raise ValueError('cannot switch from manual field specification to automatic field numbering')
+                field_name = str(counter[0]) + field_name
+                counter[0] += 1
+            elif field_name[0].isdigit():
+                if counter[0]:
+                    raise ValueError('cannot switch from automatic field numbering to manual field specification')
+                counter[1] = True
+            if format_spec and '{' in format_spec:
+                format_spec = ''.join(
+                    literal_ + ('' if name is None else '{%s%s%s}' % (name, '!' + conv if conv else '', ':' + spec))
+                    for literal_, name, spec, conv in number_fields(format_spec, counter)
+                )
+        parsed.append((literal, field_name, format_spec, conversion))
+    return parsed
+
+
+def has_stray(tokens):
+    """Check for escape characters in text that may become part of an escape sequence when joined with other text.
+
+    :param list tokens: 2-item tuples of color codes and text, like tokenize() yields.
+
+    :return: True if any text has escape characters.
+    :rtype: bool
+    """
+    return any('\033' in t for _, t in tokens if t.__class__ is not Control)
+
+
+def cached_template(cls, markup):
+    """Return the template of markup, compiling it only on the first call.
+
+    :param cls: ColorStr subclass of rendered instances.
+    :param str markup: Color markup with placeholders.
+
+    :return: Template instance.
+    :rtype: Template
+    """
+    key = (cls, markup)
+    try:
+        return TEMPLATES[key]
+    except KeyError:
+        pass
+    template = Template(cls, markup)
+    if len(TEMPLATES) >= TEMPLATES_MAX:
+        TEMPLATES.clear()
+    TEMPLATES[key] = template
+    return template
+
+
+class Template(object):
+    """Color markup with str.format() style placeholders, parsed once and rendered many times.
+
+    render() returns the same as cls(markup).format(...) would. Literal text is parsed once per theme and values
+    are spliced in between, so only the values themselves are scanned for escape sequences on each call.
+
+    :ivar cls: ColorStr subclass of rendered instances.
+    :ivar str markup: Color markup with placeholders.
+    """
+
+    def __init__(self, cls, markup):
+        """Constructor.
+
+        :param cls: ColorStr subclass of rendered instances.
+        :param str markup: Color markup with placeholders, e.g. '{red}{0}{/red} {name!r:>10}'.
+        """
+        self.cls = cls
+        self.markup = markup
+        self._compiled = None
+        self._runs = None
+        self._compile()
+
+    def __repr__(self):
+        """Representation of a class instance."""
+        return '{name}({cls}, {markup})'.format(name=self.__class__.__name__, cls=self.cls.__name__,
+                                                markup=repr(self.markup))
+
+    def _compile(self):
+        """Render markup for the current toggle state, reusing the previous result if the state didn't change.
+
+        :return: Toggle state and list of 4-item tuples: literal, its tokens, stray escape flag, field or None. Error
+            message instead of the list when automatic and manual field numbering are mixed.
+        :rtype: tuple
+        """
+        toggles = (ANSICodeMapping.DISABLE_COLORS, ANSICodeMapping.LIGHT_BACKGROUND, ANSICodeMapping.THEME,
+                   ANSICodeMapping.COLOR_DEPTH)
+        if self._compiled is not None and self._compiled[0] == toggles:
+            return self._compiled
+
+        # Markup is parsed again only when the theme changes, other toggles just render the runs again.
+        if self._runs is None or self._runs[0] != ANSICodeMapping.THEME:
+            self._runs = (ANSICodeMapping.THEME,
+                          parse_runs(self.markup, False, self.cls.TAG_DELIMITERS, self.cls.ESCAPE_TAGS))
+        value_colors = render_runs(self._runs[1], ANSICodeMapping.DISABLE_COLORS, True, self.cls.TAG_DELIMITERS)[0]
+
+        try:
+            fields = number_fields(value_colors, [0, False])
+        except ValueError as exc:  # Raised by render(), like str.format() raises it when formatting.
+            self._compiled = (toggles, str(exc))
+            return self._compiled
+
+        pieces = list()
+        for literal, field_name, format_spec, conversion in fields:
+            tokens = list(tokenize(literal, None, True))
+            stray = has_stray(tokens)
+            field = None if field_name is None else (field_name, format_spec, conversion)
+            pieces.append((literal, tokens, stray, field))
+
+        self._compiled = (toggles, pieces)
+        return self._compiled
+
+    def render(self, *args, **kwargs):
+        """Substitute placeholders with values, like str.format().
+
+        :raise ValueError: When automatic and manual field numbering are mixed.
+
+        :param iter args: Positional values.
+        :param dict kwargs: Keyword values.
+
+        :return: Class instance.
+        """
+        toggles, pieces = self._compile()
+        if not isinstance(pieces, list):
+            raise ValueError(pieces)
+        tokens = list()
+        raw = list()
+        stray = False
+        for literal, literal_tokens, literal_stray, field in pieces:
+            stray |= literal_stray
+            segments = [literal_tokens]
+            raw.append(literal)
+            if field is not None:
+                field_name, format_spec, conversion = field
+                if format_spec and '{' in format_spec:
+                    format_spec = FORMATTER.vformat(format_spec, args, kwargs)
+                value = FORMATTER.format_field(
+                    FORMATTER.convert_field(FORMATTER.get_field(field_name, args, kwargs)[0], conversion),
+                    format_spec,
+                )
+                value = getattr(value, 'value_colors', value)  # ColorStr slicing counts visible characters only.
+                if '\033' in value:
+                    value_tokens = list(tokenize(value, None, True))
+                    stray |= has_stray(value_tokens)
+                    segments.append(value_tokens)
+                else:
+                    segments.append([([], value)])
+                raw.append(value)
+
+            # Splice, merging escape sequences that end one segment with the ones starting the next.
+            for segment in segments:
+                if tokens and not tokens[-1][1]:
+                    tokens[-1] = (tokens[-1][0] + segment[0][0], segment[0][1])
+                    tokens.extend(segment[1:])
+                else:
+                    tokens.extend(segment)
+
+        if stray:
+            return self.cls(''.join(raw), keep_tags=True)
+        rendered = render_tokens(tokens, toggles[0], False, self.cls.TAG_DELIMITERS[0])
+        return self.cls._from_parsed(*rendered)  # pylint: disable=protected-access
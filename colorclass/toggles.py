@@ -1,5 +1,6 @@
 """Convenience functions to enable/disable features."""
 
+from colorclass.cache import PARSE_CACHE
 from colorclass.codes import ANSICodeMapping
 
 
@@ -40,3 +41,74 @@ def set_dark_background():
 def is_light():
     """Are background colors for light backgrounds."""
     return ANSICodeMapping.LIGHT_BACKGROUND
+
+
+def set_color_depth(depth):
+    """Downsample 256-color and truecolor tags such as {fg:#ff8800} to the colors a terminal supports.
+
+    :raise ValueError: On unsupported depths.
+
+    :param int depth: Bits per color: 4 (16 colors), 8 (256 colors), or 24 (truecolor, the default).
+    """
+    ANSICodeMapping.set_color_depth(depth)
+
+
+def get_color_depth():
+    """Return bits per color of 256-color and truecolor tags.
+
+    :return: 4, 8, or 24.
+    :rtype: int
+    """
+    return ANSICodeMapping.COLOR_DEPTH
+
+
+def enable_cache(maxsize=1024):
+    """Cache parsed markup of the most recently used strings. Clears the cache.
+
+    Parsed markup is kept across toggles, set_light_background() and set_color_depth() render it again without
+    parsing.
+
+    :param int maxsize: Maximum number of cached strings.
+    """
+    PARSE_CACHE.resize(maxsize)
+
+
+def disable_cache():
+    """Disable and clear the parsed markup cache."""
+    PARSE_CACHE.resize(0)
+
+
+def clear_cache():
+    """Remove all cached strings and reset statistics."""
+    PARSE_CACHE.clear()
+
+
+def cache_info():
+    """Return parsed markup cache statistics.
+
+    :return: Named tuple with hits, misses, maxsize, and currsize.
+    :rtype: colorclass.cache.CacheInfo
+    """
+    return PARSE_CACHE.info()
+
+
+def set_theme(theme):
+    """Define named style aliases such as {error}, used like built-in tags. Replaces the previous theme.
+
+    Each alias gets a closing tag too, e.g. {/error} closes every tag of {error}. Clears the parsed markup cache.
+
+    :raise ValueError: On aliases that aren't valid tag names or shadow built-in tags, or unknown tags in values.
+
+    :param dict theme: Keys are aliases (e.g. 'error'), values are combined tags (e.g. 'b,hired'). None to clear.
+    """
+    ANSICodeMapping.set_theme(theme)
+    PARSE_CACHE.clear()
+
+
+def get_theme():
+    """Return a copy of the current named style aliases.
+
+    :return: Keys are aliases, values are combined tags.
+    :rtype: dict
+    """
+    return dict(ANSICodeMapping.THEME)
@@ -9,6 +9,8 @@ import sys
 
 from colorclass.codes import ANSICodeMapping, BASE_CODES
 from colorclass.core import RE_SPLIT
+from colorclass.palette import downsample
+from colorclass.parse import split_codes
 
 ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
 INVALID_HANDLE_VALUE = -1
@@ -39,6 +41,23 @@ WINDOWS_CODES = {
 }
 
 
+def basic_256_code(code):
+    """Convert a 256-color or truecolor code into the nearest basic color code, the only colors of the Windows console.
+
+    :param str code: One color code from split_codes(), e.g. '38;5;208' or '48;2;255;136;0'.
+
+    :return: Basic color code (e.g. 93) or None if code is incomplete.
+    :rtype: int
+    """
+    split = [int(c) for c in code.split(';')]
+    background = split[0] == 48
+    if split[1:2] == [5] and len(split) == 3 and split[2] <= 255:
+        return int(downsample(None, split[2], background, 4))
+    if split[1:2] == [2] and len(split) == 5 and max(split[2:]) <= 255:
+        return int(downsample(tuple(split[2:]), None, background, 4))
+    return None
+
+
 class COORD(ctypes.Structure):
     """COORD structure. http://msdn.microsoft.com/en-us/library/windows/desktop/ms682119."""
 
@@ -266,7 +285,7 @@ class WindowsStream(object):
 
         :param str p_str: string to print.
         """
-        for segment in RE_SPLIT.split(p_str):
+        for segment in RE_SPLIT.split(getattr(p_str, 'value_colors', p_str)):  # Python 2 regexes slice ColorStr.
             if not segment:
                 # Empty string. p_str probably starts with colors so the first item is always ''.
                 continue
@@ -275,7 +294,11 @@ class WindowsStream(object):
                 print(segment, file=self._original_stream, end='')
                 self._original_stream.flush()
                 continue
-            for color_code in (int(c) for c in RE_NUMBER_SEARCH.findall(segment)[0].split(';')):
+            codes = RE_NUMBER_SEARCH.findall(segment)
+            if not codes:
+                continue  # Cursor movement, hyperlinks and such, not supported.
+            for code in split_codes(codes[0]):
+                color_code = int(code) if ';' not in code else basic_256_code(code)
                 if color_code in self.COMPILED_CODES:
                     self.colors = self.COMPILED_CODES[color_code]
 
@@ -3,6 +3,7 @@
 import py
 import pytest
 
+from colorclass.cache import PARSE_CACHE
 from colorclass.codes import ANSICodeMapping
 from colorclass.color import Color
 from colorclass.core import ColorStr, PARENT_CLASS
@@ -12,12 +13,16 @@ PROJECT_ROOT = py.path.local(__file__).dirpath().join('..')
 
 @pytest.fixture(autouse=True)
 def set_defaults(monkeypatch):
-    """Set ANSICodeMapping defaults before each test.
+    """Set ANSICodeMapping defaults before each test and disable the cache and theme after each test.
 
     :param monkeypatch: pytest fixture.
     """
     monkeypatch.setattr(ANSICodeMapping, 'DISABLE_COLORS', False)
     monkeypatch.setattr(ANSICodeMapping, 'LIGHT_BACKGROUND', False)
+    monkeypatch.setattr(ANSICodeMapping, 'COLOR_DEPTH', 24)
+    yield
+    PARSE_CACHE.resize(0)
+    ANSICodeMapping.set_theme(None)
 
 
 def assert_both_values(actual, expected_plain, expected_color, kind=None):
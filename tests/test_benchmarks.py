@@ -0,0 +1,152 @@
+"""Benchmark hot paths. Asserts are loose on purpose, they only catch changes in complexity.
+
+Timing tests compare wall-clock times, which a loaded machine skews. They only run with COLORCLASS_BENCHMARKS set in
+the environment.
+"""
+
+import os
+import sys
+import timeit
+
+import pytest
+
+from colorclass.color import Color
+from colorclass.core import PARENT_CLASS
+from colorclass.parse import parse_input
+from colorclass.sanitize import sanitize
+
+SCALE = 8  # Input grows by this factor. Linear time grows about as much, quadratic time grows SCALE ** 2.
+TIMING = pytest.mark.skipif(not os.environ.get('COLORCLASS_BENCHMARKS'), reason='COLORCLASS_BENCHMARKS not set.')
+
+
+def best_time(func, number=3, repeat=5):
+    """Time func several times and return the fastest run, the one least disturbed by the rest of the system.
+
+    :param func: Callable to benchmark.
+    :param int number: Calls per run.
+    :param int repeat: Number of runs.
+
+    :return: Seconds.
+    :rtype: float
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat))
+
+
+@TIMING
+@pytest.mark.parametrize('unit,count', [
+    ('{b}{red}Text{/red}{/b} ', 500),  # Input size.
+    ('{b}{red}{bgblue}{i}{u}X', 500),  # Escape density, short runs.
+    ('{red}{b}{green}{/b}', 250),  # Escape density, one long run.
+    ('\033[31m\033[1;32m\033[22m', 250),  # Existing escape sequences.
+])
+def test_parse_input_linear(unit, count):
+    """Test that parsing time grows linearly with input size and number of adjacent escape sequences.
+
+    :param str unit: Markup repeated to build the input.
+    :param int count: Repetitions of the small input.
+    """
+    small, large = unit * count, unit * count * SCALE
+    assert parse_input(large, False, False)[0]  # Warm up caches.
+    ratio = best_time(lambda: parse_input(large, False, False)) / best_time(lambda: parse_input(small, False, False))
+    assert ratio < SCALE * 3
+
+
+@TIMING
+def test_plain_fast_path():
+    """Test that strings without markup or escape sequences cost about as much as a plain str subclass."""
+    class Plain(PARENT_CLASS):
+        """Plain str subclass, the lower bound for a Color instance."""
+
+    value = 'user@example.com 2016-05-14 12:34:56 some user data'
+    plain = best_time(lambda: Plain(value), number=2000)
+    fast = best_time(lambda: Color(value), number=2000)
+    parsed = best_time(lambda: Color(value + '{b}'), number=2000)
+    assert fast < parsed / 2
+    assert fast < plain * 25
+
+
+@TIMING
+@pytest.mark.parametrize('unit', [
+    '{red}a{/red}b{b}c{/b}',
+    '{b}' + 'x' * 9 + '{/b}',
+    '{link=http://example.com/x}ab{/link} \033[2K',  # Escape sequences other than colors.
+])
+def test_iter_linear(unit):
+    """Test that iterating over characters walks the string once instead of once per character.
+
+    :param str unit: Markup repeated to build the input.
+    """
+    small, large = Color(unit * 50), Color(unit * 50 * SCALE)
+    ratio = best_time(lambda: list(large), number=1) / best_time(lambda: list(small), number=1)
+    assert ratio < SCALE * 3
+
+
+@TIMING
+def test_slice_window():
+    """Test that cutting a window out of a colored string doesn't depend on the length of the string."""
+    small = Color('{red}Text{/red} {b}bold{/b} ' * 100)
+    large = Color('{red}Text{/red} {b}bold{/b} ' * 100 * SCALE ** 2)
+    for instance in (small, large):
+        assert instance[5:85].value_no_colors == instance.value_no_colors[5:85]  # Build index and checkpoints.
+    middle = len(large) // 2
+    ratio = best_time(lambda: large[middle:middle + 80], number=20) / best_time(lambda: small[5:85], number=20)
+    assert ratio < 3
+
+
+@TIMING
+def test_style_at():
+    """Test that looking up the style of a character doesn't depend on the length of the string."""
+    small = Color('{red}Text{/red} {b}bold{/b} ' * 100)
+    large = Color('{red}Text{/red} {b}bold{/b} ' * 100 * SCALE ** 2)
+    for instance in (small, large):
+        assert instance.style_at(-1) == (None, None, frozenset())  # Build index and checkpoints.
+    middle = len(large) // 2
+    ratio = best_time(lambda: large.style_at(middle), number=100) / best_time(lambda: small.style_at(5), number=100)
+    assert ratio < 3
+
+
+@TIMING
+@pytest.mark.parametrize('keep_colors,escape', [(False, False), (True, False), (True, True)])
+def test_sanitize_linear(keep_colors, escape):
+    """Test that sanitizing time grows linearly with input size, including unterminated strings.
+
+    :param bool keep_colors: Keep color escape sequences.
+    :param bool escape: Make control characters visible.
+    """
+    unit = 'user \033[31mdata\033[0m \033]0;title\007\033[2J\x9b1m\033]2;'
+    small, large = unit * 500, unit * 500 * SCALE
+    ratio = best_time(lambda: sanitize(large, keep_colors, escape))
+    ratio /= best_time(lambda: sanitize(small, keep_colors, escape))
+    assert ratio < SCALE * 3
+
+
+@pytest.mark.parametrize('markup,count', [
+    ('{b}OK{/b}', 2000),  # Short label.
+    ('{b}2016-05-14{/b} {red}ERROR{/red} user data here', 500),  # Log line.
+    ('{b}2016-05-14{/b} {red}ERROR{/red} user data here\n' * 2000, 5),  # Log excerpt.
+], ids=['short', 'medium', 'large'])
+def test_memory_per_instance(markup, count):
+    """Report bytes per instance and test that printed instances don't store more than their colored text.
+
+    Run with -s to see the report.
+
+    :param str markup: Color markup, numbered to make instances distinct.
+    :param int count: Number of instances.
+    """
+    tracemalloc = pytest.importorskip('tracemalloc')
+    markups = [markup + str(i) for i in range(count)]
+    sizes = list()
+    for touch in (False, True):
+        tracemalloc.start()
+        instances = [Color(m) for m in markups]
+        if touch:  # Build value_no_colors and color_index.
+            for instance in instances:
+                assert len(instance) and instance.color_index
+        sizes.append((tracemalloc.get_traced_memory()[0] - sys.getsizeof(instances)) // count)
+        tracemalloc.stop()
+        del instances
+    value_colors = Color(markups[0]).value_colors
+    sys.stdout.write('\n{0} chars: {1} bytes printed, {2} bytes after len() and indexing '.format(
+        len(value_colors), *sizes
+    ))
+    assert sizes[0] < sys.getsizeof(value_colors) * 1.05 + 256
@@ -0,0 +1,42 @@
+"""Test objects in module."""
+
+from colorclass.cache import LRUCache
+
+
+def test_lru_cache():
+    """Test eviction order and statistics."""
+    cache = LRUCache(3)
+    for key in 'abc':
+        cache.put(key, key.upper())
+    assert cache.get('a') == 'A'  # Now most recently used.
+    cache.put('d', 'D')  # Evicts b.
+    assert cache.get('b') is None
+    assert [cache.get(k) for k in 'acd'] == ['A', 'C', 'D']
+    cache.put('e', 'E')  # Evicts a.
+    assert cache.get('a') is None
+    assert tuple(cache.info()) == (4, 2, 3, 3)
+
+    cache.clear()
+    assert tuple(cache.info()) == (0, 0, 3, 0)
+    assert cache.get('e') is None
+
+
+def test_lru_cache_disabled():
+    """Test maxsize 0 and resize()."""
+    cache = LRUCache()
+    cache.put('a', 'A')
+    assert cache.get('a') is None
+    assert not len(cache)
+
+    cache.resize(1)
+    cache.put('a', 'A')
+    cache.put('a', 'B')
+    assert cache.get('a') == 'B'
+    cache.put('b', 'B')
+    assert cache.get('a') is None
+    assert cache.get('b') == 'B'
+    assert len(cache) == 1
+
+    cache.resize(0)
+    assert not len(cache)
+    assert tuple(cache.info()) == (0, 0, 0, 0)
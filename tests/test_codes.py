@@ -8,7 +8,9 @@ import time
 
 import pytest
 
-from colorclass.codes import ANSICodeMapping, BASE_CODES, list_tags
+from colorclass.codes import (
+    ANSICodeMapping, BASE_CODES, color_tag_codes, combined_tag_codes, extended_tag_codes, list_tags, TAG_CODES,
+)
 from colorclass.windows import IS_WINDOWS
 
 
@@ -25,6 +27,87 @@ def test_ansi_code_mapping_whitelist():
     assert sorted(auto_codes) == ['/all', 'bgred', 'green']
     assert len(auto_codes) == 3
 
+    # Only tags present in the input are whitelisted.
+    assert not ANSICodeMapping('Test {"json": {"red": 1}}')
+    assert sorted(ANSICodeMapping('{{red}}{red}{x}{/red}{b')) == ['/red', 'red']
+
+
+@pytest.mark.parametrize('light,expected', [(False, ('91', '101')), (True, ('31', '41'))])
+def test_tag_codes(light, expected):
+    """Test precomputed auto color tables.
+
+    :param bool light: Light background table.
+    :param tuple expected: Expected autored and autobgred codes.
+    """
+    assert (TAG_CODES[light]['autored'], TAG_CODES[light]['autobgred']) == expected
+    assert TAG_CODES[light]['/autored'] == '39'
+    assert sorted(TAG_CODES[light]) == sorted(BASE_CODES)
+
+
+@pytest.mark.parametrize('tag,expected', [
+    ('red', None),
+    ('red,b,bgblue', '31;1;44'),
+    ('/red,b,/bgblue', '39;22;49'),
+    ('autored,autobgred', '91;101'),
+    ('red,/b', '31;22'),
+    ('red,x', None),
+    ('red,', None),
+    (',', None),
+])
+def test_combined_tag_codes(tag, expected):
+    """Test function.
+
+    :param str tag: Combined tag to resolve.
+    :param str expected: Expected return value.
+    """
+    assert combined_tag_codes(tag, TAG_CODES[False]) == expected
+
+
+@pytest.mark.parametrize('depth', [24, 8, 4])
+@pytest.mark.parametrize('tag,expected', [
+    ('fg:208', ('38;5;208', '38;5;208', '33')),
+    ('bg:9', ('48;5;9', '48;5;9', '101')),
+    ('fg:#ff8800', ('38;2;255;136;0', '38;5;208', '33')),
+    ('bg:#F80', ('48;2;255;136;0', '48;5;208', '43')),
+    ('fg:rgb(255, 136,0)', ('38;2;255;136;0', '38;5;208', '33')),
+    ('/fg:208', ('39', '39', '39')),
+    ('/bg:rgb(1,2,3)', ('49', '49', '49')),
+    ('fg:256', (None, None, None)),
+    ('fg:rgb(256,0,0)', (None, None, None)),
+    ('fg:#ff88', (None, None, None)),
+    ('ul:208', (None, None, None)),
+    ('fg:208 ', (None, None, None)),
+])
+def test_color_tag_codes(monkeypatch, depth, tag, expected):
+    """Test function.
+
+    :param monkeypatch: pytest fixture.
+    :param int depth: Color depth.
+    :param str tag: Color tag to resolve.
+    :param tuple expected: Expected return values for 24, 8, and 4 bit color depths.
+    """
+    monkeypatch.setattr(ANSICodeMapping, 'COLOR_DEPTH', depth)
+    assert color_tag_codes(tag) == expected[(24, 8, 4).index(depth)]
+    assert color_tag_codes(tag) == expected[(24, 8, 4).index(depth)]  # Memoized.
+
+
+@pytest.mark.parametrize('tag,expected', [
+    ('red', None),
+    ('fg:208', '38;5;208'),
+    ('fg:rgb(1,2,3)', '38;2;1;2;3'),
+    ('b,fg:rgb(1,2,3),bg:#000', '1;38;2;1;2;3;48;2;0;0;0'),
+    ('/fg:rgb(1,2,3),b', '39;22'),
+    ('fg:rgb(1,2,3', None),
+    ('x,y)', None),
+])
+def test_extended_tag_codes(tag, expected):
+    """Test function.
+
+    :param str tag: Tag to resolve.
+    :param str expected: Expected return value.
+    """
+    assert extended_tag_codes(tag, TAG_CODES[False]) == expected
+
 
 @pytest.mark.parametrize('toggle', ['light', 'dark', 'none'])
 def test_auto_toggles(toggle):
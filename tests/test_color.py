@@ -6,6 +6,7 @@ from functools import partial
 import pytest
 
 from colorclass.color import Color
+from colorclass.parse import escape
 from tests.conftest import assert_both_values, get_instance
 
 
@@ -183,3 +184,72 @@ def test_keep_tags():
     assert_both(instance, '{red}Test{/red}', '{red}\033[41mTest\033[49m{/red}')
     assert_both(instance.upper(), '{RED}TEST{/RED}', '{RED}\033[41mTEST\033[49m{/RED}')
     assert len(instance) == 15
+
+    # Codes next to tags aren't redundant, the tags may be parsed later.
+    instance = Color('{/fg}{u}\033[31m\033[0m{red}\033[39ma', keep_tags=True)
+    assert instance.value_colors == '{/fg}{u}\033[0m{red}\033[39ma'
+    assert Color(instance.value_colors).value_colors == '\033[0ma'
+
+
+def test_tag_delimiters():
+    """Test Color subclass with custom tag delimiters."""
+    class Angled(Color):
+        """Tags like <red></red>."""
+
+        TAG_DELIMITERS = ('<', '>')
+
+    instance = Angled('<red>{0}</red> {1}')
+    assert instance == '\033[31m{0}\033[39m {1}'
+    assert instance.format('{b}', 1) == '\033[31m{b}\033[39m 1'
+    assert Angled('{"key": "{red}"}') == '{"key": "{red}"}'
+    assert Angled.red('<b>Test</b>') == '\033[1;31mTest\033[22;39m'
+    assert Angled.compile('<b>{0}</b>').render('{red}') == '\033[1m{red}\033[22m'
+    assert Color('<red>Test</red>') == '<red>Test</red>'
+
+
+def test_parse_bytes():
+    """Test parse_bytes() against the decode, parse, encode round trip."""
+    markup = u'{b}\u2713 ok{/b} {"a": 1}'
+    expected = Color(markup)
+    assert Color.parse_bytes(markup.encode('utf-8')) == (
+        expected.encode('utf-8'), expected.value_no_colors.encode('utf-8')
+    )
+    assert Color.parse_bytes(bytearray(b'{b}A{/b}'), keep_tags=True) == (b'{b}A{/b}', b'{b}A{/b}')
+
+
+def test_from_untrusted():
+    """Test from_untrusted()."""
+    value = Color.from_untrusted('{red}\033[2J\033[1mhi\033[0m\007')
+    assert value == '{red}hi'
+    assert value.value_no_colors == '{red}hi'
+
+    value = Color.from_untrusted('{red}\033[2J\033[1mhi\033[0m\007', keep_colors=True)
+    assert value == '{red}\033[1mhi\033[0m'
+    assert value.value_no_colors == '{red}hi'
+
+    assert Color.from_untrusted('\033[2J', escape=True) == '\\x1b[2J'
+
+
+def test_from_format():
+    """Test from_format() against formatting escaped values into markup."""
+    class Escaped(Color):
+        """Backslashes escape tags."""
+
+        ESCAPE_TAGS = True
+
+    actual = Escaped.from_format('{red}{0}{/red} {name:>8}', '{blue}x{/all}', name='\\{b}\\')
+    assert actual == Escaped('{red}' + escape('{blue}x{/all}') + '{/red}    ' + escape('\\{b}') + '\\')
+    assert actual.value_no_colors == '{blue}x{/all}    \\{b}\\'
+    assert Color('{red}' + escape('{blue}x{/all}') + '{/red}') == '\033[31m\\\033[34mx\\\033[0m'  # Not escaped.
+    assert Color.from_format('{b}{0}{/b}', Color('{red}A{/red}')) == '\033[1;31mA\033[22;39m'
+    assert Color.from_format('{b}{0:>6}{/b}', Color('{red}ab{/red}')) == '\033[1;31mab\033[22;39m'
+    assert Color.from_format('{b}{0:>20}{/b}', Color('{red}ab{/red}')) == '\033[1m        \033[31mab\033[22;39m'
+    assert escape(Color('a\\{red}b', keep_tags=True)) == 'a\\\\\\{red}b'
+
+    # Lines keep inserted tags as text. Instantiating again parses them like any other markup.
+    actual = Color.from_format('{b}{0}{/b}\nnext', '{red}evil{/all}')
+    assert actual.splitlines()[0] == '\033[1m{red}evil{/all}\033[22m'
+    assert Color(actual.splitlines()[0]) == '\033[1;31mevil\033[0m'
+    assert Color(Escaped('\\{red}A')).value_no_colors == 'A'
+    assert Color(Color('{red}x', keep_tags=True)) == '\033[31mx'
+    assert Color(Color('a') + '{b}b{/b}') == 'a\033[1mb\033[22m'
@@ -1,11 +1,12 @@
 """Test objects in module."""
 
+import pickle
 import sys
 from functools import partial
 
 import pytest
 
-from colorclass.core import apply_text, ColorStr
+from colorclass.core import apply_text, ColorStr, PARENT_CLASS
 from tests.conftest import assert_both_values, get_instance
 
 
@@ -51,9 +52,9 @@ def test_dunder(kind):
     assert_both(instance[0], 't', '\033[31mt\033[39m')
     assert_both(instance[4], ' ', '\033[31m \033[39m')
     assert_both(instance[-1], 'e', '\033[39me')
-    # assert_both(instance[1:-1], 'est ME test ME mor', '\033[31mest ME test ME \033[39mmor')
-    # assert_both(instance[1:9:2], 'etM ', '\033[31metM \033[39m')
-    # assert_both(instance[-1::-1], 'erom EM tset EM tset', 'erom\033[31m EM tset EM tset\033[39m')
+    assert_both(instance[1:-1], 'est ME test ME mor', '\033[31mest ME test ME \033[39mmor')
+    assert_both(instance[1:9:2], 'etM ', '\033[31metM \033[39m')
+    assert_both(instance[-1::-1], 'erom EM tset EM tset', 'erom\033[31m EM tset EM tset\033[39m')
 
     with pytest.raises(IndexError):
         assert instance[20]
@@ -396,3 +397,185 @@ def test_keep_tags():
     assert_both(instance, '{red}Test{/red}', '{red}\033[41mTest\033[49m{/red}')
     assert_both(instance.upper(), '{RED}TEST{/RED}', '{RED}\033[41mTEST\033[49m{/RED}')
     assert len(instance) == 15
+
+
+@pytest.mark.parametrize('in_,keep_tags', [
+    ('', False),
+    ('Test', False),
+    (ColorStr('Test'), False),
+    (u'T\xe9st {', True),
+])
+def test_plain_fast_path(in_, keep_tags):
+    """Test strings without markup or escape sequences.
+
+    :param str in_: Input string.
+    :param bool keep_tags: Skip parsing curly bracket tags.
+    """
+    instance = ColorStr(in_, keep_tags=keep_tags)
+    assert instance == in_
+    assert instance.value_colors == instance.value_no_colors == in_
+    assert instance.value_colors.__class__ is PARENT_CLASS
+    assert instance.has_colors is False
+    assert instance.color_index == tuple(range(len(in_)))
+
+
+@pytest.mark.parametrize('method,args,expected', [
+    ('__add__', ('!',), '\033[31m-Test\033[39m \033[1mme\033[22m!'),
+    ('center', (12, '*'), '**\033[31m-Test\033[39m \033[1mme\033[22m**'),
+    ('join', (['a', 'b'],), 'a\033[31m-Test\033[39m \033[1mme\033[22mb'),
+    ('ljust', (10,), '\033[31m-Test\033[39m \033[1mme\033[22m  '),
+    ('rjust', (10,), '  \033[31m-Test\033[39m \033[1mme\033[22m'),
+    ('translate', (dict([(ord('e'), u'3')]),), '\033[31m-T3st\033[39m \033[1mm3\033[22m'),
+    ('upper', (), '\033[31m-TEST\033[39m \033[1mME\033[22m'),
+    ('zfill', (10,), '\033[31m-000000012\033[39m'),
+])
+def test_derived_skip_parsing(monkeypatch, method, args, expected):
+    """Test that methods derive their results from parsed values instead of parsing again.
+
+    :param monkeypatch: pytest fixture.
+    :param str method: Method to call.
+    :param iter args: Method arguments.
+    :param str expected: Expected value_colors.
+    """
+    instance = ColorStr('{red}-12{/red}' if method == 'zfill' else '{red}-Test{/red} {b}me{/b}')
+    reparsed = ColorStr(expected, keep_tags=True)
+
+    monkeypatch.setattr('colorclass.core.parse_input', lambda *_: 0 / 0)
+    actual = getattr(instance, method)(*args)
+    assert actual.value_colors == reparsed.value_colors == expected
+    assert actual.value_no_colors == reparsed.value_no_colors
+    assert actual.has_colors is True
+    assert actual.color_index == reparsed.color_index
+
+
+@pytest.mark.parametrize('in_', ['Plain', '{red}Red{/red} \033[1mBold\033[0m'])
+def test_lazy_fields(monkeypatch, in_):
+    """Test that color_index is only built when needed, and value_no_colors too if it differs from value_colors.
+
+    :param monkeypatch: pytest fixture.
+    :param str in_: Input string.
+    """
+    expected = ColorStr(in_)
+    expected = (expected.value_no_colors, expected.has_colors, expected.color_index)
+
+    instance = ColorStr(in_)
+    assert instance._has_colors is (False if instance.value_colors == in_ else None)
+    assert instance._value_no_colors is None
+    assert instance._color_index is None
+    monkeypatch.setattr('colorclass.core.build_color_index', lambda *_: 0 / 0)
+    assert str(instance) == instance.value_colors
+    assert len(instance) == len(expected[0])
+    assert (instance.value_no_colors, instance.has_colors) == expected[:2]
+    with pytest.raises(ZeroDivisionError):
+        assert instance[0]
+    monkeypatch.undo()
+    assert instance.color_index == expected[2]
+    assert instance.color_index is instance.color_index
+    assert ''.join(c.value_no_colors for c in instance) == expected[0]
+
+
+def test_derived_parse_again():
+    """Test that results are parsed again when joined escape sequences may be combined or become redundant."""
+    red = ColorStr('{red}Red{/red}')
+    assert (red + red).value_colors == '\033[31mRedRed\033[39m'
+    assert ColorStr(' ').join([red, red]).value_colors == '\033[31mRed\033[39m \033[31mRed\033[39m'
+    assert red.translate(dict((ord(c), None) for c in 'Red')).value_colors == '\033[39m'
+    assert (red + '\033[1m').value_colors == '\033[31mRed\033[1;39m'
+
+
+@pytest.mark.parametrize('gil', [True, False])
+@pytest.mark.parametrize('workers', [None, 1, 3])
+def test_from_many(monkeypatch, workers, gil):
+    """Test batch parsing.
+
+    :param monkeypatch: pytest fixture.
+    :param int workers: Number of threads.
+    :param bool gil: Pretend the GIL is enabled or not.
+    """
+    monkeypatch.setattr(sys, '_is_gil_enabled', lambda: gil, raising=False)
+    values = ['{red}%d{/red}' % (i % 7) for i in range(50)] + ['', 'plain', ColorStr('{b}B{/b}')]
+    actual = ColorStr.from_many(iter(values), workers=workers)
+    assert [a.value_colors for a in actual] == [ColorStr(v).value_colors for v in values]
+    assert [a.color_index for a in actual] == [ColorStr(v).color_index for v in values]
+    assert all(a.__class__ is ColorStr for a in actual)
+    assert actual[0] is actual[7]
+
+    assert ColorStr.from_many(['{b}B{/b}'], keep_tags=True, workers=workers) == ['{b}B{/b}']
+
+    # Equal strings of different classes are parsed separately, regardless of order.
+    values = ['{b}B', ColorStr('{b}B', keep_tags=True)]
+    for ordered in (values, values[::-1]):
+        actual = ColorStr.from_many(ordered, workers=workers)
+        assert [a.value_colors for a in actual] == [ColorStr(v).value_colors for v in ordered]
+        assert actual[0] is not actual[1]
+    assert ColorStr.from_many([], workers=workers) == []
+
+
+def test_controls():
+    """Test escape sequences other than colors, such as hyperlinks and cursor movement."""
+    instance = ColorStr('\033[2K{link=http://a}{red}Link{/red}{/link}\033[1A')
+    assert len(instance) == 4
+    assert instance.value_no_colors == 'Link'
+    assert instance.center(8).value_no_colors == '  Link  '
+    assert instance.center(8).value_colors == '  ' + instance.value_colors + '  '
+    assert instance.rjust(6).color_index == (0, 1) + tuple(i + 2 for i in instance.color_index)
+    assert instance.upper().value_colors == instance.value_colors.replace('Link', 'LINK')
+    assert instance.upper().value_colors.count('http://a') == 1
+    assert [c.value_no_colors for c in instance] == list('Link')
+
+
+def test_slice():
+    """Test slices without a step, which Python 2 passes to __getslice__() with negative positions adjusted."""
+    instance = ColorStr(u'{red}test ME {/red}test ME more')
+    for actual in (instance[1:-1], instance[slice(1, -1)]):
+        assert actual.__class__ is ColorStr
+        assert actual.value_colors == '\033[31mest ME \033[39mtest ME mor'
+    assert instance[-4:].value_colors == 'more'
+    assert instance[:3].upper().value_colors == '\033[31mTES\033[39m'
+
+
+def test_iter_runs():
+    """Test iterating over runs of text with the same style."""
+    assert list(ColorStr('').iter_runs()) == list()
+    assert list(ColorStr('Plain').iter_runs()) == [((), 'Plain')]
+    instance = ColorStr('{b}{red}A{/red}B{/b} {hiblue}C{/all}')
+    assert list(instance.iter_runs()) == [(('1', '31'), 'A'), (('1',), 'B'), ((), ' '), (('94',), 'C')]
+    assert ''.join(t for _, t in instance.iter_runs()) == instance.value_no_colors
+    assert list(ColorStr('{bgblue}a\033[mb').iter_runs()) == [(('44',), 'a'), ((), 'b')]
+
+
+def test_style_at():
+    """Test looking up the style of visible characters."""
+    instance = ColorStr('{b}{red}A{/red}{u}{bg:208}B{/all}C {fg:#ff8800}D')
+    assert instance.style_at(0) == ('31', None, frozenset(['b']))
+    assert instance.style_at(1) == (None, '48;5;208', frozenset(['b', 'u']))
+    assert instance.style_at(2) == instance.style_at(-3) == (None, None, frozenset())
+    assert instance.style_at(-1).fg == '38;2;255;136;0'
+    assert ColorStr('Plain').style_at(4) == (None, None, frozenset())
+    for pos in (5, -6):
+        with pytest.raises(IndexError):
+            instance.style_at(pos)
+
+    # Empty codes reset the style.
+    instance = ColorStr('{bgblue}{b}a\033[mb\033[;4mc')
+    assert [instance.style_at(i) for i in range(3)] == [
+        (None, '44', frozenset(['b'])), (None, None, frozenset()), (None, None, frozenset(['u'])),
+    ]
+
+
+@pytest.mark.parametrize('protocol', range(pickle.HIGHEST_PROTOCOL + 1))
+@pytest.mark.parametrize('in_', ['', 'Plain', '{red}Red{/red} \033[1mBold\033[0m', '\\{red}A'])
+def test_pickle(protocol, in_):
+    """Test pickling instances after their lazy fields are computed, restoring them without parsing.
+
+    :param int protocol: Pickle protocol.
+    :param str in_: Input string.
+    """
+    instance = ColorStr(in_)
+    assert (len(instance), instance.value_no_colors, instance.color_index) is not None
+    actual = pickle.loads(pickle.dumps(instance, protocol))
+    assert actual.__class__ is ColorStr
+    assert actual.value_colors == instance.value_colors
+    assert actual.value_no_colors == instance.value_no_colors
+    assert len(actual) == len(instance)
+    assert actual.color_index == instance.color_index
@@ -0,0 +1,79 @@
+"""Test objects in module."""
+
+import pytest
+
+from colorclass.palette import basic_code, downsample, nearest_16, nearest_256, PALETTE_256
+
+
+def test_palette_256():
+    """Test palette table."""
+    assert len(PALETTE_256) == 256
+    assert PALETTE_256[16] == (0, 0, 0)
+    assert PALETTE_256[208] == (255, 135, 0)
+    assert PALETTE_256[231] == (255, 255, 255)
+    assert PALETTE_256[232] == (8, 8, 8)
+    assert PALETTE_256[255] == (238, 238, 238)
+
+
+@pytest.mark.parametrize('rgb,expected', [
+    ((0, 0, 0), 16),
+    ((255, 255, 255), 231),
+    ((255, 136, 0), 208),
+    ((255, 135, 0), 208),
+    ((128, 128, 128), 244),
+    ((3, 3, 3), 16),
+    ((250, 250, 250), 231),
+])
+def test_nearest_256(rgb, expected):
+    """Test function.
+
+    :param tuple rgb: Input color.
+    :param int expected: Expected return value.
+    """
+    assert nearest_256(rgb) == expected
+    assert nearest_256(rgb) == expected  # Memoized.
+    if expected < 232:  # Same as checking every color of the cube and grayscale ramp, except for ties.
+        assert min(range(16, 256), key=lambda i: sum((a - b) ** 2 for a, b in zip(rgb, PALETTE_256[i]))) == expected
+
+
+@pytest.mark.parametrize('rgb,expected', [
+    ((0, 0, 0), 0),
+    ((255, 136, 0), 3),
+    ((255, 30, 30), 9),
+    ((120, 120, 130), 8),
+])
+def test_nearest_16(rgb, expected):
+    """Test function.
+
+    :param tuple rgb: Input color.
+    :param int expected: Expected return value.
+    """
+    assert nearest_16(rgb) == expected
+
+
+@pytest.mark.parametrize('rgb,index,background,depth,expected', [
+    ((255, 136, 0), None, False, 24, '38;2;255;136;0'),
+    ((255, 136, 0), None, True, 8, '48;5;208'),
+    ((255, 136, 0), None, False, 4, '33'),
+    (None, 208, False, 24, '38;5;208'),
+    (None, 208, True, 8, '48;5;208'),
+    (None, 208, True, 4, '43'),
+    (None, 9, False, 4, '91'),
+    (None, 12, True, 4, '104'),
+])
+def test_downsample(rgb, index, background, depth, expected):
+    """Test function.
+
+    :param tuple rgb: Input truecolor.
+    :param int index: Input 256-color index.
+    :param bool background: Background color.
+    :param int depth: Color depth.
+    :param str expected: Expected return value.
+    """
+    assert downsample(rgb, index, background, depth) == expected
+
+
+def test_basic_code():
+    """Test function."""
+    assert [basic_code(i, False) for i in (0, 7, 8, 15)] == [30, 37, 90, 97]
+    assert [basic_code(i, True) for i in (0, 7, 8, 15)] == [40, 47, 100, 107]
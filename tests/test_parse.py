@@ -2,7 +2,11 @@
 
 import pytest
 
-from colorclass.parse import parse_input, prune_overridden
+from colorclass.codes import ANSICodeMapping
+from colorclass.parse import (
+    apply_codes, combine_codes, Control, escape, parse_input, parse_input_bytes, parse_runs, prune_overridden,
+    render_runs, RESET_STATE, scanners, split_codes, strip_input, style_runs,
+)
 
 
 @pytest.mark.parametrize('in_,expected', [
@@ -13,6 +17,11 @@ from colorclass.parse import parse_input, prune_overridden
     ('\033[1;2mTEST\033[22;22m', '\033[1;2mTEST\033[22m'),
     ('\033[1;1;1;1;1;1mTEST\033[22m', '\033[1mTEST\033[22m'),
     ('\033[31;32;41;42mTEST\033[39;49m', '\033[32;42mTEST\033[39;49m'),
+    ('\033[1;22;2mTEST\033[2;22;1m', '\033[2mTEST\033[1;2m'),
+    ('\033[' + ';'.join(['31', '1', '32', '22'] * 500) + 'm', '\033[22;32m'),
+    ('\033[38;5;208;1;31m', '\033[1;31m'),
+    ('\033[31;38;5;5;48;2;1;40;0;1m', '\033[1;38;5;5;48;2;1;40;0m'),
+    ('\033[38;2;1;2m', '\033[38;2;1;2m'),
 ])
 def test_prune_overridden(in_, expected):
     """Test function.
@@ -39,6 +48,15 @@ def test_prune_overridden(in_, expected):
     ('{red}T{red}E{red}S{red}T{/all}', '\033[31mTEST\033[0m', 'TEST'),
     ('{red}T{/all}E{/all}S{/all}T{/all}', '\033[31mT\033[0mEST', 'TEST'),
     ('{red}{bgblue}TES{red}{bgblue}T{/all}', '\033[31;44mTEST\033[0m', 'TEST'),
+    ('{red}A{b}{red}B{/b}{red}C', '\033[31mA\033[1mB\033[22mC', 'ABC'),
+    ('{b}A{/b}{b}B{/all}C{/all}{/fg}D', '\033[1mAB\033[0mCD', 'ABCD'),
+    ('\033[31mA\033[31mB\033[1mC\033[22m\033[1mD', '\033[31mAB\033[1mCD', 'ABCD'),
+    ('{x}{red}{{b}}{/red}', '{x}\033[31m{\033[1m}\033[39m', '{x}{}'),
+    ('{red}A{fg:208}B{/fg:208}{bg:#ff8800}C{fg:9}{red}D', '\033[31mA\033[38;5;208mB\033[39;48;2;255;136;0mC\033[31mD',
+     'ABCD'),
+    ('{red,b,bgblue}TEST{/red,b,bgblue}', '\033[1;31;44mTEST\033[22;39;49m', 'TEST'),
+    ('{b,autored}A{/autored,/b}B{red,red}C{/all,u}D', '\033[1;91mA\033[22;39mB\033[31mC\033[0mD', 'ABCD'),
+    ('{red,x}A{red,}B{,b}C{/}D', '{red,x}A{red,}B{,b}C{/}D', '{red,x}A{red,}B{,b}C{/}D'),
 ])
 def test_parse_input(disable, in_, expected_colors, expected_no_colors):
     """Test function.
@@ -56,12 +74,104 @@ def test_parse_input(disable, in_, expected_colors, expected_no_colors):
     assert actual_no_colors == expected_no_colors
 
 
+@pytest.mark.parametrize('in_,expected_colors,expected_no_colors', [
+    ('\033[2K{red}A\033[1A\033[1;1H', '\033[2K\033[31mA\033[1A\033[1;1H', 'A'),
+    ('{red}\033[2K{b}A', '\033[31m\033[2K\033[1mA', 'A'),
+    ('{red}A\033]8;;http://a\033\\{red}B\033]8;;\033\\', '\033[31mA\033]8;;http://a\033\\B\033]8;;\033\\', 'AB'),
+    ('{link=https://example.com/?a=1&b=2}{b}Link{/b}{/link}',
+     '\033]8;;https://example.com/?a=1&b=2\033\\\033[1mLink\033[22m\033]8;;\033\\', 'Link'),
+    ('\033]0;title\007A\033[?25l\033[ q', '\033]0;title\007A\033[?25l\033[ q', 'A'),
+    ('{link=}\033]8;;unterminated\033[{b}', '{link=}\033]8;;unterminated\033[\033[1m',
+     '{link=}\033]8;;unterminated\033['),
+])
+def test_parse_input_controls(in_, expected_colors, expected_no_colors):
+    """Test escape sequences other than colors, which are zero-width and never combined with colors.
+
+    :param str in_: Input string to pass to function.
+    :param str expected_colors: Expected first item of return value.
+    :param str expected_no_colors: Expected second item of return value.
+    """
+    assert parse_input(in_, False, False) == (expected_colors, expected_no_colors)
+    assert parse_input(in_, True, False) == (expected_no_colors, expected_no_colors)
+    assert strip_input(in_, False) == expected_no_colors
+
+
+def test_parse_input_colors_only():
+    """Test skipping the output without colors."""
+    assert parse_input('{b}A{/b}', False, False, no_colors=False) == ('\033[1mA\033[22m', None)
+    assert parse_input('{b}A{/b}', True, False, no_colors=False) == ('A', 'A')
+
+
+@pytest.mark.parametrize('in_', [
+    '',
+    'test',
+    '{b}{autored}A{/autored}{/b} {fg:#ff8800}B{/fg} {bg:208}C{/all}',
+    '{on_autoblue}\033[1mA\033[2J{i}B{/i}\\{b}{/on_autoblue}',
+    '\033[{b}1m\033[3{b}',
+])
+def test_render_runs(in_):
+    """Test rendering parsed runs with different toggles, without parsing again.
+
+    :param str in_: Input string to pass to function.
+    """
+    runs = parse_runs(in_, False)
+    assert parse_runs(in_, False) == runs
+    for light, depth, disable in ((False, 24, False), (True, 24, False), (True, 4, False), (False, 8, True)):
+        ANSICodeMapping.LIGHT_BACKGROUND = light
+        ANSICodeMapping.COLOR_DEPTH = depth
+        assert render_runs(runs, disable) == parse_input(in_, disable, False)
+        assert render_runs(runs, disable, no_colors=False)[0] == parse_input(in_, disable, False)[0]
+
+
+@pytest.mark.parametrize('in_,expected', [
+    ('', []),
+    ('test', [((), 'test')]),
+    ('\033[1;31mA\033[39mB\033[22m C', [(('1', '31'), 'A'), (('1',), 'B'), ((), ' C')]),
+    ('\033[31mA\033[31mB\033[0m', [(('31',), 'AB')]),
+    ('\033[44mA\033[mB\033[1;mC', [(('44',), 'A'), ((), 'BC')]),
+    ('\033[38;5;208;4mA\033[2JB', [(('4', '38;5;208'), 'A'), (('4', '38;5;208'), Control('\033[2J')),
+                                   (('4', '38;5;208'), 'B')]),
+])
+def test_style_runs(in_, expected):
+    """Test function.
+
+    :param str in_: Input string to pass to function.
+    :param list expected: Expected yielded items.
+    """
+    actual = list(style_runs(in_))
+    assert actual == expected
+    assert [t.__class__ for _, t in actual] == [t.__class__ for _, t in expected]
+
+
+@pytest.mark.parametrize('in_,expected', [
+    ('\033[31mA\033[mB', '\033[31mA\033[0mB'),
+    ('\033[31mA\033[;1mB\033[1;m', '\033[31mA\033[0;1mB\033[0m'),
+    ('\033[44mA\033[m\033[1mB', '\033[44mA\033[0;1mB'),
+])
+def test_parse_input_empty_codes(in_, expected):
+    """Test escape sequences with empty codes, which reset like '0' does.
+
+    :param str in_: Input string to pass to function.
+    :param str expected: Expected colored output.
+    """
+    assert parse_input(in_, False, False)[0] == expected
+    assert parse_input(in_, False, True)[0] == expected
+
+
+def test_parse_input_joined_text():
+    """Test text around removed tags forming new escape sequences."""
+    assert parse_input('\033[{b}1m\033[3{b}', False, False) == ('\033[\033[1m1m\033[3', '\033[1m\033[3')
+    assert parse_input('\033[{b}1m\033[3{b}', True, False) == ('\033[3', '\033[3')
+
+
 @pytest.mark.parametrize('disable', [True, False])
 @pytest.mark.parametrize('in_,expected_colors,expected_no_colors', [
     ('', '', ''),
     ('test', 'test', 'test'),
     ('{b}TEST{/b}', '{b}TEST{/b}', '{b}TEST{/b}'),
     ('D {/all}{i}\033[31;103mE {/all}', 'D {/all}{i}\033[31;103mE {/all}', 'D {/all}{i}E {/all}'),
+    ('{/fg}{u}\033[31m\033[0m{red}\033[39ma', '{/fg}{u}\033[0m{red}\033[39ma', '{/fg}{u}{red}a'),
+    ('\033[31m{red}\033[31ma', '\033[31m{red}\033[31ma', '{red}a'),
 ])
 def test_parse_input_keep_tags(disable, in_, expected_colors, expected_no_colors):
     """Test function with keep_tags=True.
@@ -77,3 +187,192 @@ def test_parse_input_keep_tags(disable, in_, expected_colors, expected_no_colors
     else:
         assert actual_colors == expected_colors
     assert actual_no_colors == expected_no_colors
+
+
+@pytest.mark.parametrize('codes,expected', [
+    ('1;31', ['1', '31']),
+    ('1;38;5;208;48;2;255;136;0;4', ['1', '38;5;208', '48;2;255;136;0', '4']),
+    ('38;5', ['38;5']),
+    ('38;2;1;2', ['38;2;1;2']),
+    ('38;9;1', ['38', '9', '1']),
+    ('38', ['38']),
+])
+def test_split_codes(codes, expected):
+    """Test function.
+
+    :param str codes: Input codes to pass to function.
+    :param list expected: Expected return value.
+    """
+    assert split_codes(codes) == expected
+
+
+@pytest.mark.parametrize('pending,expected', [
+    (['31'], '31'),
+    (['1', '31'], '1;31'),
+    (['32;31', '39;0'], '0'),
+    (['31', '1', '32', '22'], '22;32'),
+])
+def test_combine_codes(pending, expected):
+    """Test function.
+
+    :param list pending: Input codes to pass to function.
+    :param str expected: Expected return value.
+    """
+    assert combine_codes(pending) == expected
+    assert combine_codes(pending) == expected  # Cached.
+
+
+@pytest.mark.parametrize('state,codes,expected,expected_state', [
+    ({}, '1;31', '1;31', {1: '31', 2: '1'}),
+    ({1: '31', 2: '1'}, '1;31', '', {1: '31', 2: '1'}),
+    ({1: '31', 2: '1'}, '22;31', '22', {1: '31', 2: '22', 3: '22'}),
+    ({1: '31'}, '0;31', '0;31', dict(list(RESET_STATE.items()) + [(1, '31')])),
+    (dict(RESET_STATE), '0;39', '', RESET_STATE),
+    ({1: '31'}, '10;31', '10;31', {1: '31'}),
+    ({1: '31', 2: '1'}, '1;38;5;208', '38;5;208', {1: '38;5;208', 2: '1'}),
+    ({1: '38;5;208'}, '38;5;208;48;2;0;0;0', '48;2;0;0;0', {0: '48;2;0;0;0', 1: '38;5;208'}),
+])
+def test_apply_codes(state, codes, expected, expected_state):
+    """Test function.
+
+    :param dict state: Terminal style state before codes are applied.
+    :param str codes: Input codes to pass to function.
+    :param str expected: Expected return value.
+    :param dict expected_state: Terminal style state after codes are applied.
+    """
+    assert apply_codes(state, codes) == expected
+    assert state == expected_state
+
+
+@pytest.mark.parametrize('keep_tags', [False, True])
+@pytest.mark.parametrize('in_,expected,expected_keep_tags', [
+    ('', '', ''),
+    ('{b}A {red}B {x}{green}{bgred}C {/all}', 'A B {x}C ', '{b}A {red}B {x}{green}{bgred}C {/all}'),
+    ('D {/all}{i}\033[31;103mE {/all}', 'D E ', 'D {/all}{i}E {/all}'),
+    ('\033[{b}1m\033[3{b}', '\033[3', '\033[{b}1m\033[3{b}'),
+    ('{b,red}A{/b,red}{b,x}', 'A{b,x}', '{b,red}A{/b,red}{b,x}'),
+    ('\033[{b,red}1m', '', '\033[{b,red}1m'),
+])
+def test_strip_input(in_, expected, expected_keep_tags, keep_tags):
+    """Test function.
+
+    :param str in_: Input string to pass to function.
+    :param str expected: Expected return value.
+    :param str expected_keep_tags: Expected return value with keep_tags.
+    :param bool keep_tags: Skip removing curly bracket tags.
+    """
+    assert strip_input(in_, keep_tags) == (expected_keep_tags if keep_tags else expected)
+
+
+@pytest.mark.parametrize('delimiters,in_,expected_colors,expected_no_colors', [
+    (('<', '>'), '{"a": 1} <red>{b}</red>', '{"a": 1} \033[31m{b}\033[39m', '{"a": 1} {b}'),
+    (('[[', ']]'), '[[red]]A[[[[b]]B]][[x]][[/all]]', '\033[31mA[[\033[1mB]][[x]]\033[0m', 'A[[B]][[x]]'),
+    (('[[', ']]'), '[[b [[red]]A]]', '[[b \033[31mA]]', '[[b A]]'),
+    (('$(', ')'), '$(b,red)A$(/all)$(.*)', '\033[1;31mA\033[0m$(.*)', 'A$(.*)'),
+    (('{', '}'), '{b}A{/b}', '\033[1mA\033[22m', 'A'),
+])
+def test_parse_input_delimiters(delimiters, in_, expected_colors, expected_no_colors):
+    """Test custom tag delimiters.
+
+    :param tuple delimiters: Opening and closing string of tags.
+    :param str in_: Input string to pass to function.
+    :param str expected_colors: Expected first item of return value.
+    :param str expected_no_colors: Expected second item of return value.
+    """
+    assert parse_input(in_, False, False, delimiters) == (expected_colors, expected_no_colors)
+    assert parse_input(in_, True, False, delimiters) == (expected_no_colors, expected_no_colors)
+    assert scanners(delimiters) is scanners(delimiters)  # Compiled once.
+
+
+@pytest.mark.parametrize('delimiters', [('', '>'), ('<', ''), ('\033[', 'm')])
+def test_scanners_invalid(delimiters):
+    """Test invalid tag delimiters.
+
+    :param tuple delimiters: Opening and closing string of tags.
+    """
+    with pytest.raises(ValueError):
+        scanners(delimiters)
+
+
+@pytest.mark.parametrize('disable', [True, False])
+@pytest.mark.parametrize('in_,expected_colors,expected_no_colors', [
+    (b'', b'', b''),
+    (b'{"a": 1}', b'{"a": 1}', b'{"a": 1}'),
+    (b'{b}A{/b}', b'\033[1mA\033[22m', b'A'),
+    (u'{red}\u2713 \xe9{/red}{x}'.encode('utf-8'), u'\033[31m\u2713 \xe9\033[39m{x}'.encode('utf-8'),
+     u'\u2713 \xe9{x}'.encode('utf-8')),
+    (b'\033[31m\033[1m\xff\xfe\033[0m', b'\033[1;31m\xff\xfe\033[0m', b'\xff\xfe'),
+])
+@pytest.mark.parametrize('kind', [bytes, bytearray, memoryview])
+def test_parse_input_bytes(kind, in_, expected_colors, expected_no_colors, disable):
+    """Test function.
+
+    :param kind: Type of input.
+    :param bytes in_: Input bytes to pass to function.
+    :param bytes expected_colors: Expected first item of return value.
+    :param bytes expected_no_colors: Expected second item of return value.
+    :param bool disable: Disable colors?
+    """
+    actual_colors, actual_no_colors = parse_input_bytes(kind(in_), disable, False)
+    assert actual_colors == (expected_no_colors if disable else expected_colors)
+    assert actual_no_colors == expected_no_colors
+    assert actual_colors.__class__ is actual_no_colors.__class__ is bytes
+    assert parse_input_bytes(kind(b'{b}\033[1mA'), disable, True)[1] == b'{b}A'
+
+
+@pytest.mark.parametrize('disable', [False, True])
+@pytest.mark.parametrize('in_,expected_colors,expected_no_colors', [
+    ('\\{red}A', '{red}A', '{red}A'),
+    ('\\\\{red}A', '\\\033[31mA', '\\A'),
+    ('\\\\\\{red}A', '\\{red}A', '\\{red}A'),
+    ('{b}\\{red}{/b}', '\033[1m{red}\033[22m', '{red}'),
+    ('{b}\\\\{/b}', '\033[1m\\\033[22m', '\\'),
+    ('\\{x} \\\\{x}', '{x} \\{x}', '{x} \\{x}'),
+    ('C:\\ \\\\ {b}', 'C:\\ \\\\ \033[1m', 'C:\\ \\\\ '),
+])
+def test_parse_input_escaped(disable, in_, expected_colors, expected_no_colors):
+    """Test tags escaped with backslashes. Backslashes not before tags are left as they are.
+
+    :param bool disable: Disable colors.
+    :param str in_: Input string to pass to the function.
+    :param str expected_colors: Expected first item of return value.
+    :param str expected_no_colors: Expected second item of return value.
+    """
+    actual = parse_input(in_, disable, False, escapes=True)
+    assert actual == ((expected_no_colors, expected_no_colors) if disable else (expected_colors, expected_no_colors))
+    assert parse_input(in_, disable, True, escapes=True) == (in_, in_)
+
+
+@pytest.mark.parametrize('disable', [False, True])
+def test_parse_input_backslashes(disable):
+    """Test that backslashes before tags are plain text unless escapes are enabled.
+
+    :param bool disable: Disable colors.
+    """
+    actual = parse_input('{red}C:\\Users\\{/red} done', disable, False)
+    assert actual[1] == 'C:\\Users\\ done'
+    assert actual[0] == (actual[1] if disable else '\033[31mC:\\Users\\\033[39m done')
+
+
+@pytest.mark.parametrize('in_,delimiters,expected', [
+    ('', ('{', '}'), ''),
+    ('plain', ('{', '}'), 'plain'),
+    ('{red}A{/all}', ('{', '}'), '\\{red}A\\{/all}'),
+    ('{unknown} {', ('{', '}'), '\\{unknown} {'),
+    ('\\{b} \\\\{b}', ('{', '}'), '\\\\\\{b} \\\\\\\\\\{b}'),
+    ('C:\\', ('{', '}'), 'C:\\\\'),
+    ('{red}<red>', ('<', '>'), '{red}\\<red>'),
+])
+def test_escape(in_, delimiters, expected):
+    """Test escaping tags and parsing them back.
+
+    :param str in_: Input string to pass to the function.
+    :param tuple delimiters: Tag delimiters.
+    :param str expected: Expected return value.
+    """
+    escaped = escape(in_, delimiters)
+    assert escaped == expected
+    opening, closing = delimiters
+    for disable in (False, True):
+        markup = opening + 'b' + closing + escaped + opening + '/b' + closing
+        assert parse_input(markup, disable, False, delimiters, escapes=True)[1] == in_
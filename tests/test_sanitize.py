@@ -0,0 +1,63 @@
+"""Test objects in module."""
+
+import pytest
+
+from colorclass.sanitize import sanitize
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('plain text', 'plain text'),
+    ('tab\tand\nnewline\r\n', 'tab\tand\nnewline\n'),
+    ('{red}tags{/red}', '{red}tags{/red}'),
+    ('\033[31mred\033[0m', 'red'),
+    ('\033[2J\033[1;1Hcleared', 'cleared'),
+    ('\033[?25lhidden', 'hidden'),
+    ('\033]0;title\007text', 'text'),
+    ('\033]8;;http://x\033\\link\033]8;;\033\\', 'link'),
+    ('\033P1$r\033\\dcs', 'dcs'),
+    ('\033cReset\033(B', 'Reset'),
+    ('\x9b31mC1\x9dtitle\x9c', 'C1'),
+    ('bell\007 back\010 del\x7f nul\x00', 'bell back del nul'),
+    ('\033[31', '31'),  # Truncated sequence, only the escape is removed.
+    ('\033]0;unterminated title', ''),
+    ('\033', ''),
+])
+def test_remove(text, expected):
+    """Test removing escape sequences and control characters.
+
+    :param str text: Untrusted text.
+    :param str expected: Expected output.
+    """
+    assert sanitize(text) == expected
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('\033[31mred\033[0m', '\033[31mred\033[0m'),
+    ('\033[1;38;5;208mx\033[m', '\033[1;38;5;208mx\033[m'),
+    ('\033[2J\033[31mred\033[K', '\033[31mred'),
+    ('\033]0;\033[31m\007title', '\033[31mtitle'),  # Terminals cancel the string on escape.
+    ('\x9b31mC1', 'C1'),
+])
+def test_keep_colors(text, expected):
+    """Test keeping color escape sequences.
+
+    :param str text: Untrusted text.
+    :param str expected: Expected output.
+    """
+    assert sanitize(text, keep_colors=True) == expected
+
+
+@pytest.mark.parametrize('text,keep_colors,expected', [
+    ('\033[2Jx\ty\n', False, '\\x1b[2Jx\ty\n'),
+    ('\033[31mred\007', False, '\\x1b[31mred\\x07'),
+    ('\033[31mred\033[2J', True, '\033[31mred\\x1b[2J'),
+    ('\x9b1m', True, '\\x9b1m'),
+])
+def test_escape(text, keep_colors, expected):
+    """Test making control characters visible.
+
+    :param str text: Untrusted text.
+    :param bool keep_colors: Keep color escape sequences.
+    :param str expected: Expected output.
+    """
+    assert sanitize(text, keep_colors, escape=True) == expected
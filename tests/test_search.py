@@ -2,7 +2,11 @@
 
 import pytest
 
-from colorclass.search import build_color_index, find_char_color
+from colorclass.core import ColorStr
+from colorclass.search import (
+    add_codes, build_color_index, closing_codes, codes_style, ColorIndex, find_char_color, iter_char_colors,
+    slice_colors, Style,
+)
 
 
 @pytest.mark.parametrize('in_,expected', [
@@ -10,6 +14,7 @@ from colorclass.search import build_color_index, find_char_color
     ['TEST', (0, 1, 2, 3)],
     ['!\033[31mRed\033[0m', (0, 6, 7, 8)],
     ['\033[1mA \033[31mB \033[32;41mC \033[0mD', (4, 5, 11, 12, 21, 22, 27)],
+    ['\033[2KA\033[1;2HB\033]8;;http://a\033\\C\033]0;title\007D', (4, 11, 27, 38)],
 ])
 def test_build_color_index(in_, expected):
     """Test function.
@@ -49,3 +54,174 @@ def test_find_char_color(in_, pos, expected):
     color_pos = index[pos]
     actual = find_char_color(in_, color_pos)
     assert actual == expected
+    assert find_char_color(in_, color_pos, index) == expected
+
+
+@pytest.mark.parametrize('in_', [
+    '',
+    'TEST',
+    '\033[31mTEST\033[0m',
+    '\033[31mT\033[32mE\033[33mS\033[34mT',
+    'T\033[1;31mES\033[22mT\033[39m',
+    '\033[0;31mA\033[0;31mB',
+    '\033[38;5;208;48;2;1;2;3mA\033[53mB\033[0m',
+    '\033[44mA\033[mB',
+])
+def test_iter_char_colors(in_):
+    """Test function against indexing every character.
+
+    :param str in_: Input string to pass to function.
+    """
+    instance = ColorStr(in_, keep_tags=True)
+    expected = [instance[i].value_colors for i in range(len(instance))]
+    actual = list(iter_char_colors(in_))
+    assert [c for c, _ in actual] == expected
+    assert ''.join(c for _, c in actual) == ColorStr(in_).value_no_colors
+
+
+def test_iter_char_colors_empty_codes():
+    """Test that '\\033[m' resets the style like '\\033[0m' does."""
+    assert list(iter_char_colors('\033[44mA\033[mB')) == [('\033[44mA\033[49m', 'A'), ('\033[0mB', 'B')]
+    assert [c.value_colors for c in ColorStr('{bgblue}a\033[mb')] == ['\033[44ma\033[49m', '\033[0mb']
+
+
+def test_iter_char_colors_controls():
+    """Test escape sequences other than colors, only the hyperlink active at a character is kept around it."""
+    actual = list(iter_char_colors('\033]8;;http://a\007\033[2K\033[31mAB\033[39m\033]8;;\007\033[1AC'))
+    assert actual == [
+        ('\033]8;;http://a\007\033[31mA\033[39m\033]8;;\033\\', 'A'),
+        ('\033]8;;http://a\007\033[31mB\033[39m\033]8;;\033\\', 'B'),
+        ('\033[39mC', 'C'),
+    ]
+
+
+@pytest.mark.parametrize('start,stop,step,expected', [
+    (0, 0, 1, ''),
+    (0, 3, 1, '\033[1;31mAB\033[22mC\033[39m'),
+    (1, 2, 1, '\033[1;31mB\033[22;39m'),
+    (2, 6, 1, '\033[31mC\033[39m\033[2JDE\033[44mF\033[49m'),
+    (4, 5, 1, 'E'),
+    (5, -1, -1, '\033[44mF\033[49mED\033[31mC\033[1mBA\033[22;39m'),
+    (0, 6, 2, '\033[1;31mA\033[22mC\033[39mE'),
+])
+def test_slice_colors(start, stop, step, expected):
+    """Test function.
+
+    :param int start: Position of the first visible character.
+    :param int stop: Position after the last visible character.
+    :param int step: Step between characters.
+    :param str expected: Expected return value.
+    """
+    in_ = '\033[1;31mAB\033[22mC\033[39m\033[2JDE\033[44mF\033[0m'
+    assert ColorStr(slice_colors(in_, start, stop, step), keep_tags=True) == expected
+
+
+def test_slice_colors_empty_codes():
+    """Test that '\\033[m' ends the style active before it."""
+    assert ColorStr('{red}a\033[mb{/red}')[1:] == 'b'
+    assert ColorStr('{red}a\033[mb{/red}')[:2] == '\033[31ma\033[0mb'
+    assert ColorStr('{red}a\033[mb{red}c')[:0:-1] == '\033[31mc\033[39mb'
+    assert ColorStr(slice_colors('\033[31ma\033[mb', 1, 2, 1), keep_tags=True) == 'b'
+
+
+@pytest.mark.parametrize('item,expected', [
+    (slice(1, 3), '\033]8;;http://x\033\\ab\033]8;;\033\\'),
+    (slice(2, 4), '\033]8;;http://x\033\\b\033]8;;\033\\y'),
+    (slice(0, 4), 'x\033]8;;http://x\033\\ab\033]8;;\033\\y'),
+    (slice(3, None, -2), 'y\033]8;;http://x\033\\a\033]8;;\033\\'),
+    (slice(1, None, 2), '\033]8;;http://x\033\\a\033]8;;\033\\y'),
+    (2, '\033]8;;http://x\033\\b\033]8;;\033\\'),
+    (3, 'y'),
+])
+def test_slice_colors_links(item, expected):
+    """Test that hyperlinks are opened before and closed after characters inside them.
+
+    :param item: Slice or position of characters.
+    :param str expected: Expected value_colors.
+    """
+    assert ColorStr('x{link=http://x}ab{/link}y')[item].value_colors == expected
+
+
+@pytest.mark.parametrize('codes,expected', [
+    ('', ''),
+    ('0', ''),
+    ('22;39', ''),
+    ('1;2;31', '22;39'),
+    ('0;38;5;208;48;2;1;2;3', '39;49'),
+    ('4;53', '0'),
+])
+def test_closing_codes(codes, expected):
+    """Test function.
+
+    :param str codes: Input codes to pass to function.
+    :param str expected: Expected return value.
+    """
+    assert closing_codes(codes) == expected
+
+
+@pytest.mark.parametrize('codes,expected', [
+    ('', (None, None, frozenset())),
+    ('0', (None, None, frozenset())),
+    ('22;39;49', (None, None, frozenset())),
+    ('1;4;31;44', ('31', '44', frozenset(['b', 'u']))),
+    ('0;2;9;38;5;208;48;2;1;2;3', ('38;5;208', '48;2;1;2;3', frozenset(['f', 'strike']))),
+    ('3;5;6;7;8;91;104', ('91', '104', frozenset(['i', 'flash', 'outline', 'negative', 'invis']))),
+])
+def test_codes_style(codes, expected):
+    """Test function.
+
+    :param str codes: Input codes to pass to function.
+    :param tuple expected: Expected return value.
+    """
+    actual = codes_style(codes)
+    assert actual == expected
+    assert actual.__class__ is Style
+
+
+def test_codes_before():
+    """Test combining codes from checkpoints."""
+    in_ = ''.join('\033[{0}m{1}'.format(31 + i % 7, i) for i in range(200)) + '\033[1mX'
+    index = ColorIndex(in_)
+    assert index.codes_before(0) == '31'
+    assert index.codes_before(1) == '32'
+    assert index.codes_before(200) == '1;34'
+    assert [index.codes_before(r) for r in range(201)] == [
+        add_codes('', index.escapes[:index.raw_starts[r] - index.visible_starts[r]]) for r in range(201)
+    ]
+    assert ColorIndex('A\033[31mB').codes_before(0) == ''
+
+
+def test_link_before():
+    """Test looking up the hyperlink open before a run."""
+    index = ColorIndex('A\033]8;;http://a\007B\033[1mC\033]8;id=1;http://b\033\\D\033]8;;\007E')
+    assert [index.link_before(r) for r in range(5)] == [
+        '', '\033]8;;http://a\007', '\033]8;;http://a\007', '\033]8;id=1;http://b\033\\', '',
+    ]
+    assert ColorIndex('A\033[1mB').links is None
+
+
+def test_color_index():
+    """Test ColorIndex sequence behavior and size."""
+    index = ColorIndex('\033[1mA \033[31mB \033[32;41mC \033[0mD')
+    assert [list(a) for a in (index.visible_starts, index.raw_starts, index.lengths)] == [
+        [0, 2, 4, 6], [4, 11, 21, 27], [2, 2, 2, 1],
+    ]
+    assert index.escapes == '\033[1m\033[31m\033[32;41m\033[0m'
+    assert len(index) == 7
+    assert list(index) == [4, 5, 11, 12, 21, 22, 27]
+    assert [index[i] for i in range(-7, 0)] == list(index)
+    assert index[1:4] == (5, 11, 12)
+    assert index == ColorIndex('\033[2mA \033[31mB \033[32;42mC \033[0mD')
+    assert index != ColorIndex('A \033[31mB \033[32;42mC \033[0mD')
+    assert index != 'string'
+    assert repr(index) == 'ColorIndex([(4, 2), (11, 2), (21, 2), (27, 1)])'
+    for item in (7, -8):
+        with pytest.raises(IndexError):
+            assert index[item]
+    assert len(ColorIndex('')) == 0
+    assert ColorIndex('') == ()
+    assert find_char_color('T\033[31mES\033[0mT', 2) == '\033[31m\033[0m'  # Not a visible character.
+
+    # Runs grow with escape sequences, not text.
+    assert len(ColorIndex('x' * 100000).lengths) == 1
+    assert len(ColorIndex('\033[31m' + 'x' * 100000 + '\033[0m' + 'y' * 100000).lengths) == 2
@@ -0,0 +1,137 @@
+"""Test objects in module."""
+
+from functools import partial
+
+import pytest
+
+from colorclass.codes import ANSICodeMapping
+from colorclass.color import Color
+from colorclass.template import cached_template, number_fields, Template, TEMPLATES
+
+
+@pytest.mark.parametrize('in_,expected', [
+    ('{}{}', ['0', '1']),
+    ('{0}{1}{0}', ['0', '1', '0']),
+    ('{name}{}{.real}{[1]}', ['name', '0', '1.real', '2[1]']),
+    ('{:{}}{:>{}.{}}', ['0', '2']),
+])
+def test_number_fields(in_, expected):
+    """Test function.
+
+    :param str in_: Input string to pass to function.
+    :param list expected: Expected field names.
+    """
+    actual = number_fields(in_, [0, False])
+    assert [i[1] for i in actual if i[1] is not None] == expected
+
+
+def test_number_fields_nested():
+    """Test nested fields in format specs."""
+    assert number_fields('{:{}}{:>{}.{}}', [0, False])[1][2] == '>{3:}.{4:}'
+    with pytest.raises(ValueError):
+        number_fields('{0}{}', [0, False])
+    with pytest.raises(ValueError):
+        number_fields('{}{0}', [0, False])
+
+
+@pytest.mark.parametrize('light', [False, True])
+@pytest.mark.parametrize('disable', [False, True])
+@pytest.mark.parametrize('markup,args,kwargs', [
+    ('', (), {}),
+    ('{red}{0}{/red}', ('Test',), {}),
+    ('{red}{}{/red} {}', ('A', Color('{b}B{/b}')), {}),
+    ('{bgred}a{0}c{0}{/bgred}', (Color('{green}B{/green}'),), {}),
+    ('{red}a{value}c{value}{/red}', (), {'value': Color('{bggreen}B{/bggreen}')}),
+    ('{red}{0}{/red}', (Color('{red}B{/red}'),), {}),
+    ('{b}{autored}{0!r:>{1}}{/all}', ('X', 6), {}),
+    ('{red}{0}{/red}{1}', ('\033[31mA\033[', '31mB'), {}),
+    ('{red}{0}{/red}', ('{blue}Moo{/blue}',), {}),
+    ('{{{0}}}', ('\033[1m',), {}),
+    ('XXX: {0.real:03d}', (7,), {}),
+    ('{link=http://a}{red}{0}{/red}{/link}', ('\033[2KA',), {}),
+    ('{red}{0}\033[1A{b}{1}', (Color('{link=http://a}{red}L{/red}{/link}'), 'B'), {}),
+])
+def test_render(markup, args, kwargs, disable, light):
+    """Test rendering matches Color.format().
+
+    :param str markup: Template markup.
+    :param tuple args: Positional values.
+    :param dict kwargs: Keyword values.
+    :param bool disable: Disable colors.
+    :param bool light: Light background.
+    """
+    ANSICodeMapping.DISABLE_COLORS = disable
+    ANSICodeMapping.LIGHT_BACKGROUND = light
+    template = Color.compile(markup)
+    expected = Color(markup).format(*args, **kwargs)
+
+    for _ in range(2):
+        actual = template.render(*args, **kwargs)
+        assert actual.__class__ == Color
+        assert actual.value_colors == expected.value_colors
+        assert actual.value_no_colors == expected.value_no_colors
+        assert actual.has_colors == expected.has_colors
+        assert actual.color_index == expected.color_index
+
+
+def test_render_toggles():
+    """Test rendering after toggling colors."""
+    template = Template(Color, '{autored}{0}{/autored}')
+    assert repr(template) == "Template(Color, '{autored}{0}{/autored}')"
+    assert template.render('A') == '\033[91mA\033[39m'
+    ANSICodeMapping.LIGHT_BACKGROUND = True
+    assert template.render('A') == '\033[31mA\033[39m'
+    ANSICodeMapping.DISABLE_COLORS = True
+    assert template.render(Color('{b}A{/b}')) == 'A'
+
+    with pytest.raises(IndexError):
+        template.render()
+
+
+@pytest.mark.parametrize('markup', ['{0}{}', '{red}{}{/red}{0}', '{:{0}}'])
+def test_render_mixed_numbering(markup):
+    """Test that mixed automatic and manual numbering raises when rendering, like str.format() and Color.format().
+
+    :param str markup: Color markup with placeholders.
+    """
+    template = Template(Color, markup)
+    for func in (template.render, partial(Color.from_format, markup), Color(markup).format):
+        with pytest.raises(ValueError):
+            func('A', 'B')
+
+
+@pytest.mark.parametrize('markup,width', [('{0:>9}|', 9), ('{0:>20}|', 20), ('{red}{0:<{1}}{/red}', 16)])
+def test_render_color_width(markup, width):
+    """Test rendering instances with a width, returned by format_field() as-is when wider than the width.
+
+    :param str markup: Markup with a width spec.
+    :param int width: Width.
+    """
+    value = Color('{red}ab{/red}cd')
+    actual = Template(Color, markup).render(value, width)
+    assert actual == Color(markup).format(value, width)
+    assert 'abcd' in actual.value_no_colors
+
+
+def test_render_toggles_no_parse(monkeypatch):
+    """Test that toggles other than the theme render the markup again without parsing it.
+
+    :param monkeypatch: pytest fixture.
+    """
+    template = Template(Color, '{autored}{0}{/autored}')
+    monkeypatch.setattr('colorclass.template.parse_runs', lambda *_: 0 / 0)
+    ANSICodeMapping.LIGHT_BACKGROUND = True
+    assert template.render('A') == '\033[31mA\033[39m'
+    ANSICodeMapping.LIGHT_BACKGROUND = False
+    assert template.render('A') == '\033[91mA\033[39m'
+    ANSICodeMapping.set_theme(dict(error='red'))
+    with pytest.raises(ZeroDivisionError):
+        template.render('A')
+
+
+def test_cached_template():
+    """Test template cache."""
+    template = cached_template(Color, '{red}{0}{/red}')
+    assert cached_template(Color, '{red}{0}{/red}') is template
+    assert (Color, '{red}{0}{/red}') in TEMPLATES
+    assert cached_template(Color, '{red}{1}{/red}') is not template
@@ -1,6 +1,9 @@
 """Test objects in module."""
 
+import pytest
+
 from colorclass import toggles
+from colorclass.color import Color
 
 
 def test_disable():
@@ -27,3 +30,124 @@ def test_light_bg():
     assert not toggles.is_light()
     toggles.set_light_background()
     assert toggles.is_enabled()
+
+
+def test_cache():
+    """Test functions."""
+    toggles.enable_cache(2)
+    assert Color('{autored}Test{/autored}') == '\033[91mTest\033[39m'
+    assert Color('{autored}Test{/autored}') == '\033[91mTest\033[39m'
+    assert Color('{autored}Test{/autored}', keep_tags=True) == '{autored}Test{/autored}'
+    assert toggles.cache_info() == (1, 1, 2, 1)  # Skipped, no markup to parse with keep_tags.
+
+    # Toggles render cached markup again without parsing it.
+    toggles.set_light_background()
+    assert Color('{autored}Test{/autored}') == '\033[31mTest\033[39m'
+    toggles.set_dark_background()
+    assert Color('{autored}Test{/autored}') == '\033[91mTest\033[39m'
+    toggles.disable_all_colors()
+    assert Color('{autored}Test{/autored}') == 'Test'
+    assert Color('{autored}Test{/autored}').value_no_colors == 'Test'
+    assert toggles.cache_info() == (3, 1, 2, 1)  # Skipped, nothing to cache when colors are disabled.
+
+    toggles.clear_cache()
+    assert toggles.cache_info() == (0, 0, 2, 0)
+    toggles.disable_cache()
+    Color('{autored}Test{/autored}')
+    assert toggles.cache_info() == (0, 0, 0, 0)
+
+
+def test_cache_toggles_no_parse(monkeypatch):
+    """Test that toggles render cached markup again without parsing it.
+
+    :param monkeypatch: pytest fixture.
+    """
+    toggles.enable_cache(2)
+    assert Color('{autored}Test{/autored} {fg:#ff8800}X{/fg}') == '\033[91mTest\033[39m \033[38;2;255;136;0mX\033[39m'
+    monkeypatch.setattr('colorclass.core.parse_runs', lambda *_: 0 / 0)
+    toggles.set_light_background()
+    toggles.set_color_depth(8)
+    assert Color('{autored}Test{/autored} {fg:#ff8800}X{/fg}') == '\033[31mTest\033[39m \033[38;5;208mX\033[39m'
+    toggles.set_dark_background()
+    assert Color('{autored}Test{/autored} {fg:#ff8800}X{/fg}') == '\033[91mTest\033[39m \033[38;5;208mX\033[39m'
+
+    # Rendered again once, later hits use the stored output.
+    monkeypatch.setattr('colorclass.core.render_runs', lambda *_: 0 / 0)
+    assert Color('{autored}Test{/autored} {fg:#ff8800}X{/fg}') == '\033[91mTest\033[39m \033[38;5;208mX\033[39m'
+
+
+def test_theme():
+    """Test functions."""
+    toggles.enable_cache(4)
+    assert toggles.get_theme() == dict()
+    assert Color('{error}Test{/error}') == '{error}Test{/error}'
+
+    toggles.set_theme(dict(error='b,hired', ok='autogreen', reset='/all'))
+    assert toggles.get_theme() == dict(error='b,hired', ok='autogreen', reset='/all')
+    assert Color('{error}Test{/error}') == '\033[1;91mTest\033[22;39m'
+    assert Color('{ok}A{/ok}{ok,u}B{/ok,u}{reset}') == '\033[92mA\033[4mB\033[0m'
+    assert Color('{/reset}') == '{/reset}'
+    toggles.disable_all_colors()
+    assert Color('{error}Test{/error}') == 'Test'
+    toggles.enable_all_colors()
+
+    # Switching themes clears the cache.
+    template = Color.compile('{error}{0}{/error}')
+    toggles.set_theme(dict(error='red'))
+    assert toggles.cache_info().currsize == 0
+    assert Color('{error}Test{/error}') == '\033[31mTest\033[39m'
+    assert template.render('Test') == '\033[31mTest\033[39m'
+    assert Color('{ok}Test{/ok}') == '{ok}Test{/ok}'
+
+    toggles.set_theme(None)
+    assert Color('{error}Test{/error}') == '{error}Test{/error}'
+
+
+@pytest.mark.parametrize('theme', [
+    dict(red='b'),
+    dict(err='b,x'),
+    dict(err=''),
+    {'': 'b'},
+    {'/err': 'b'},
+    {'a,b': 'b'},
+    {'a}b': 'b'},
+    {'a:b': 'b'},
+    {'a=b': 'b'},
+    {'a b': 'b'},
+    {'a\n': 'b'},
+    {'all': 'b'},
+    {'fg': 'b'},
+    {'bg': 'b'},
+])
+def test_theme_invalid(theme):
+    """Test invalid aliases and values.
+
+    :param dict theme: Theme to set.
+    """
+    toggles.set_theme(dict(ok='green'))
+    with pytest.raises(ValueError):
+        toggles.set_theme(theme)
+    assert toggles.get_theme() == dict(ok='green')
+
+
+def test_color_depth():
+    """Test functions."""
+    toggles.enable_cache(4)
+    template = Color.compile('{fg:#ff8800}{0}')
+    assert toggles.get_color_depth() == 24
+    assert Color('{fg:#ff8800}A') == '\033[38;2;255;136;0mA'
+    assert template.render('A') == '\033[38;2;255;136;0mA'
+
+    toggles.set_color_depth(8)
+    assert Color('{fg:#ff8800}A') == '\033[38;5;208mA'
+    assert template.render('A') == '\033[38;5;208mA'
+
+    toggles.set_color_depth(4)
+    assert toggles.get_color_depth() == 4
+    assert Color('{fg:#ff8800}A') == '\033[33mA'
+    assert Color('\033[38;2;255;136;0mA') == '\033[38;2;255;136;0mA'  # Only tags are downsampled.
+    assert template.render('A') == '\033[33mA'
+
+    with pytest.raises(ValueError):
+        toggles.set_color_depth(16)
+    assert toggles.get_color_depth() == 4
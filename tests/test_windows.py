@@ -225,6 +225,14 @@ def test_windows_stream():
     assert original_stream.read() == 'ABC'
     assert stream.colors == (windows.WINDOWS_CODES['red'], windows.WINDOWS_CODES['bgblue'])
 
+    # Test 256-color and truecolor codes, converted to the nearest basic color.
+    original_stream.seek(0)
+    original_stream.truncate()
+    stream.write('\x1b[0mA\x1b[38;5;208;48;2;0;0;40mB\x1b[38;2;255;40;0mC\x1b[38;5mD\x1b[2K\x1b]8;;http://a\x1b\\E')
+    original_stream.seek(0)
+    assert original_stream.read() == 'ABCDE'
+    assert stream.colors == (windows.WINDOWS_CODES['hired'], windows.WINDOWS_CODES['black'])
+
 
 @pytest.mark.skipif(str(windows.IS_WINDOWS))
 def test_windows_nix():